@@ -5,11 +5,22 @@ Handles audio transcription with speaker diarization and SOAP format generation.
 
 import os
 import json
-import tempfile
-from typing import Optional
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 import httpx
+import orjson
+from pydantic import ValidationError
+
+from app.schemas.analysis import SOAPResult
+from app.services.audio import probe_duration, transcode_16k_mono, voiced_seconds
+from app.services.cache import LRUCache, content_digest
+from app.services.rate_limit import AsyncRateLimiter
+from app.services.soap_cache import soap_cache
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -18,6 +29,70 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
 GROQ_WHISPER_URL = "https://api.groq.com/openai/v1/audio/transcriptions"
 GROQ_CHAT_URL = "https://api.groq.com/openai/v1/chat/completions"
 
+# Minimum size of an audio segment worth sending to Whisper
+MIN_AUDIO_BYTES = 1000
+
+# Recordings shorter than this, or with less detected speech, never reach Whisper
+# (both checks are skipped when PyAV/webrtcvad are not installed)
+MIN_AUDIO_SECONDS = 3.0
+MIN_VOICED_SECONDS = 0.3
+
+# verbose_json reports the detected language by name, the request takes ISO 639-1
+WHISPER_LANGUAGE_CODES = {
+    "russian": "ru",
+    "kazakh": "kk",
+    "english": "en",
+    "uzbek": "uz",
+    "kyrgyz": "ky",
+    "ukrainian": "uk",
+    "turkish": "tr",
+}
+
+# Cap on concurrent Whisper requests across all sessions
+WHISPER_CONCURRENCY = int(os.getenv("WHISPER_CONCURRENCY", "5"))
+_whisper_semaphore = asyncio.Semaphore(WHISPER_CONCURRENCY)
+
+# Cap on analysis sessions processed at once; the rest wait in a FIFO queue
+# and are told their position every QUEUE_STATUS_INTERVAL seconds
+ANALYSIS_CONCURRENCY = int(os.getenv("ANALYSIS_CONCURRENCY", "8"))
+QUEUE_STATUS_INTERVAL = 2.0
+_analysis_semaphore = asyncio.Semaphore(ANALYSIS_CONCURRENCY)
+_analysis_queue: list[object] = []
+
+# Token bucket kept under Groq's requests-per-minute quota
+_groq_limiter = AsyncRateLimiter(float(os.getenv("GROQ_RPM", "30")), period=60.0)
+
+# Transcriptions of recently seen audio, keyed on a digest of the bytes
+_whisper_cache: LRUCache[dict] = LRUCache(maxsize=int(os.getenv("WHISPER_CACHE_SIZE", "256")))
+
+# SOAP models, cheapest first; the next one is tried only when the previous
+# answer does not validate or leaves subjective/plan empty
+SOAP_MODELS = ("llama-3.1-8b-instant", "llama-3.3-70b-versatile")
+
+# Shared Groq client: keeps TLS connections alive and multiplexes
+# concurrent requests over HTTP/2 instead of reconnecting on every call
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    """Return the shared Groq HTTP client, creating it on first use."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(120.0),
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared Groq HTTP client (called on application shutdown)."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
 
 async def transcribe_audio(audio_data: bytes, language: str = "auto") -> dict:
     """
@@ -33,57 +108,253 @@ async def transcribe_audio(audio_data: bytes, language: str = "auto") -> dict:
     if not GROQ_API_KEY:
         return {"error": "GROQ_API_KEY not configured", "text": ""}
     
-    # Save audio to temp file
-    with tempfile.NamedTemporaryFile(suffix=".webm", delete=False) as f:
-        f.write(audio_data)
-        temp_path = f.name
+    # Re-submitted recordings are answered without calling Whisper again
+    # (hashlib releases the GIL, so large blobs are hashed in a thread)
+    cache_key = await asyncio.to_thread(content_digest, audio_data, language)
+    cached = _whisper_cache.get(cache_key)
+    if cached is not None:
+        return dict(cached)
+    
+    # Downmix/resample to what Whisper actually uses before uploading
+    transcoded = await asyncio.to_thread(transcode_16k_mono, audio_data)
+    
+    client = _get_http_client()
+    # httpx builds the multipart body straight from the in-memory bytes
+    if transcoded is not None:
+        files = {"file": ("audio.ogg", transcoded, "audio/ogg")}
+    else:
+        files = {"file": ("audio.webm", audio_data, "audio/webm")}
+    data = {
+        "model": "whisper-large-v3",
+        "response_format": "verbose_json",  # Get word-level timestamps
+    }
+    
+    # Only set language if not auto-detect
+    if language != "auto":
+        data["language"] = language
+    
+    await _groq_limiter.acquire()
+    response = await client.post(
+        GROQ_WHISPER_URL,
+        headers={"Authorization": f"Bearer {GROQ_API_KEY}"},
+        files=files,
+        data=data,
+    )
+    
+    if response.status_code != 200:
+        error_text = response.text
+        logger.error("Whisper API error: %s", error_text)
+        return {"error": f"Transcription failed: {error_text}", "text": ""}
     
+    result = response.json()
+    transcription = {
+        "text": result.get("text", ""),
+        "language": result.get("language", language),
+        "segments": result.get("segments", []),
+    }
+    _whisper_cache.set(cache_key, transcription)
+    return dict(transcription)
+
+
+async def _send_json(websocket: WebSocket, payload: dict) -> None:
+    """Send a JSON text frame serialized with orjson."""
+    await websocket.send_text(orjson.dumps(payload).decode())
+
+
+class _SoapFieldScanner:
+    """
+    Incremental scanner for the top-level fields of a streamed JSON object.
+
+    Text is fed in as it arrives from the LLM; every top-level string field
+    is returned once its value has been fully received.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = -1  # index of the next unread char; -1 until "{" is seen
+        self._decoder = json.JSONDecoder()
+
+    def _skip_ws(self, pos: int) -> int:
+        while pos < len(self._buffer) and self._buffer[pos] in " \t\r\n":
+            pos += 1
+        return pos
+
+    def feed(self, chunk: str) -> list[tuple[str, str]]:
+        self._buffer += chunk
+        if self._pos < 0:
+            start = self._buffer.find("{")
+            if start < 0:
+                return []
+            self._pos = start + 1
+
+        fields = []
+        buf = self._buffer
+        while True:
+            pos = self._skip_ws(self._pos)
+            if pos < len(buf) and buf[pos] == ",":
+                pos = self._skip_ws(pos + 1)
+            if pos >= len(buf) or buf[pos] != '"':
+                return fields
+            try:
+                key, pos = json.decoder.scanstring(buf, pos + 1)
+                pos = self._skip_ws(pos)
+                if pos >= len(buf) or buf[pos] != ":":
+                    return fields
+                pos = self._skip_ws(pos + 1)
+                if pos >= len(buf):
+                    return fields
+                if buf[pos] == '"':
+                    value, pos = json.decoder.scanstring(buf, pos + 1)
+                    fields.append((key, value))
+                else:
+                    # Non-string values are skipped; a number may still be
+                    # growing, so only accept it once something follows it
+                    _, pos = self._decoder.raw_decode(buf, pos)
+                    if pos >= len(buf):
+                        return fields
+            except json.JSONDecodeError:
+                return fields  # value not complete yet
+            self._pos = pos
+
+
+FieldCallback = Callable[[str, str], Awaitable[None]]
+
+
+class ChatAPIError(RuntimeError):
+    """Non-200 answer from the chat completions API."""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+async def _stream_chat_content(
+    client: httpx.AsyncClient,
+    payload: dict,
+    on_field: Optional[FieldCallback] = None,
+) -> str:
+    """
+    Stream a chat completion over SSE and return the full message content.
+
+    Raises ChatAPIError with the status and API error text on a non-200 response.
+    """
+    scanner = _SoapFieldScanner()
+    parts: list[str] = []
+
+    await _groq_limiter.acquire()
+    async with client.stream(
+        "POST",
+        GROQ_CHAT_URL,
+        headers={
+            "Authorization": f"Bearer {GROQ_API_KEY}",
+            "Content-Type": "application/json",
+        },
+        json={**payload, "stream": True},
+        timeout=60.0,
+    ) as response:
+        if response.status_code != 200:
+            error_text = (await response.aread()).decode("utf-8", "replace")
+            raise ChatAPIError(response.status_code, error_text)
+
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            chunk = orjson.loads(data)
+            delta = (chunk.get("choices") or [{}])[0].get("delta", {}).get("content")
+            if not delta:
+                continue
+            parts.append(delta)
+            if on_field is not None:
+                for key, value in scanner.feed(delta):
+                    await on_field(key, value)
+
+    return "".join(parts)
+
+
+# Cleared once the API has said it does not support JSON mode on a streamed
+# request; later requests then skip JSON mode
+_json_mode_streaming = True
+
+
+def _rejects_streamed_json_mode(error: ChatAPIError) -> bool:
+    """Whether an API error says response_format cannot be combined with streaming."""
+    text = str(error)
     try:
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            with open(temp_path, "rb") as audio_file:
-                files = {"file": ("audio.webm", audio_file, "audio/webm")}
-                data = {
-                    "model": "whisper-large-v3",
-                    "response_format": "verbose_json",  # Get word-level timestamps
-                }
-                
-                # Only set language if not auto-detect
-                if language != "auto":
-                    data["language"] = language
-                
-                response = await client.post(
-                    GROQ_WHISPER_URL,
-                    headers={"Authorization": f"Bearer {GROQ_API_KEY}"},
-                    files=files,
-                    data=data,
-                )
-            
-            if response.status_code != 200:
-                error_text = response.text
-                print(f"Whisper API error: {error_text}")
-                return {"error": f"Transcription failed: {error_text}", "text": ""}
-            
-            result = response.json()
-            return {
-                "text": result.get("text", ""),
-                "language": result.get("language", language),
-                "segments": result.get("segments", []),
-            }
-    finally:
-        # Cleanup temp file
+        # Only the message counts: the body of a json_validate_failed error also
+        # carries the failed generation, which may contain any text
+        text = orjson.loads(text)["error"]["message"]
+    except (orjson.JSONDecodeError, KeyError, TypeError):
+        pass
+    text = text.lower()
+    return "response_format" in text and "stream" in text
+
+
+async def _request_soap_content(payload: dict, on_field: Optional[FieldCallback]) -> str:
+    """
+    Stream a SOAP completion, in JSON mode when the API accepts it with streaming.
+
+    Whether Groq accepts response_format together with stream=True is not
+    guaranteed, so a request rejected as invalid (400/422) is retried once as
+    a plain stream; _parse_soap_content tolerates the looser output. JSON mode
+    is only switched off for later requests when the error says the
+    combination is unsupported; any other 400 (e.g. json_validate_failed for
+    one malformed generation) only affects this request.
+    """
+    global _json_mode_streaming
+    client = _get_http_client()
+    if _json_mode_streaming:
         try:
-            os.unlink(temp_path)
-        except:
-            pass
+            return await _stream_chat_content(
+                client, {**payload, "response_format": {"type": "json_object"}}, on_field
+            )
+        except ChatAPIError as e:
+            if e.status_code not in (400, 422):
+                raise
+            logger.warning("Streamed JSON mode rejected (%d), retrying without it: %s", e.status_code, e)
+            if _rejects_streamed_json_mode(e):
+                _json_mode_streaming = False
+    return await _stream_chat_content(client, payload, on_field)
+
+
+def _parse_soap_content(content: str) -> Optional[SOAPResult]:
+    """Validate an LLM answer against the SOAP schema, or None if it does not conform."""
+    # Outside JSON mode the object may come wrapped in a code fence or prose
+    start, end = content.find("{"), content.rfind("}")
+    if start >= 0 and end > start:
+        content = content[start:end + 1]
+    try:
+        return SOAPResult.model_validate_json(content)
+    except ValidationError as e:
+        logger.warning("LLM response does not match the SOAP schema: %s", e)
+        logger.debug("Raw content: %s", content)
+        return None
 
 
-async def generate_soap_analysis(transcript: str, language: str = "ru") -> dict:
+def _is_confident(analysis: SOAPResult) -> bool:
+    """Cheap acceptance check: the critical fields are filled in."""
+    return bool(analysis.subjective.strip() and analysis.plan.strip())
+
+
+async def generate_soap_analysis(
+    transcript: str,
+    language: str = "ru",
+    on_field: Optional[FieldCallback] = None,
+) -> dict:
     """
     Generate SOAP format analysis from transcript using Groq LLM.
     
+    A small model is tried first and the answer is escalated to the next model
+    in SOAP_MODELS only when it fails _is_confident. The completion is
+    streamed; on_field, if given, is awaited with each top-level field as soon
+    as its value is complete (fields are re-sent after an escalation).
+    
     Args:
         transcript: Transcribed text
         language: Language of the transcript
+        on_field: Optional async callback receiving (field, value)
     
     Returns:
         dict with SOAP format fields
@@ -94,6 +365,12 @@ async def generate_soap_analysis(transcript: str, language: str = "ru") -> dict:
     if not transcript or len(transcript) < 20:
         return {"error": "Transcript too short for analysis"}
     
+    # An identical transcript (retried or resent recording) reuses its analysis
+    cached = soap_cache.lookup(transcript, language)
+    if cached is not None:
+        logger.info("SOAP analysis served from cache")
+        return cached
+    
     # System prompt for SOAP analysis
     system_prompt = """You are a medical documentation assistant. Analyze the doctor-patient conversation and generate a structured medical note in SOAP format.
 
@@ -117,114 +394,240 @@ If information for a field is not available, leave it empty but include the fiel
 Respond ONLY with the JSON object, no additional text."""
 
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                GROQ_CHAT_URL,
-                headers={
-                    "Authorization": f"Bearer {GROQ_API_KEY}",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "model": "llama-3.3-70b-versatile",
-                    "messages": [
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": f"Analyze this medical consultation transcript:\n\n{transcript}"}
-                    ],
-                    "temperature": 0.1,
-                    "max_tokens": 4000,
-                },
-            )
-            
-            if response.status_code != 200:
-                error_text = response.text
-                print(f"LLM API error: {error_text}")
-                return {"error": f"Analysis failed: {error_text}"}
+        analysis = None
+        for model in SOAP_MODELS:
+            payload = {
+                "model": model,
+                "messages": [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": f"Analyze this medical consultation transcript:\n\n{transcript}"}
+                ],
+                "temperature": 0.1,
+                "max_tokens": 4000,
+            }
+            is_last = model == SOAP_MODELS[-1]
+            try:
+                content = await _request_soap_content(payload, on_field)
+            except (RuntimeError, httpx.HTTPError, orjson.JSONDecodeError) as e:
+                logger.error("LLM API error (%s): %s", model, e)
+                # A parsed answer from a smaller model still beats an error
+                if is_last and analysis is None:
+                    return {"error": f"Analysis failed: {e}"}
+                continue
             
-            result = response.json()
-            content = result.get("choices", [{}])[0].get("message", {}).get("content", "")
+            parsed = _parse_soap_content(content)
+            if parsed is not None:
+                analysis = parsed
+                if _is_confident(parsed):
+                    break
+            if not is_last:
+                logger.info("SOAP answer from %s rejected, escalating", model)
+        
+        if analysis is None:
+            # Return raw content as dialogue if parsing fails
+            return {
+                "dialogueProtocol": transcript,
+                "generalCondition": "",
+                "recommendations": "",
+                "conclusion": "Анализ завершен, но структурирование данных не удалось.",
+                "subjective": "",
+                "objective": "",
+                "assessment": "",
+                "plan": "",
+            }
+        
+        result = analysis.model_dump()
+        # An answer kept only because escalation failed is not cached, so a retry can improve it
+        if _is_confident(analysis):
+            soap_cache.store(transcript, language, result)
+        return result
             
-            # Parse JSON from response
-            try:
-                # Handle potential markdown code blocks
-                if "```json" in content:
-                    content = content.split("```json")[1].split("```")[0]
-                elif "```" in content:
-                    content = content.split("```")[1].split("```")[0]
-                
-                analysis = json.loads(content.strip())
-                return analysis
-            except json.JSONDecodeError as e:
-                print(f"Failed to parse LLM response as JSON: {e}")
-                print(f"Raw content: {content}")
-                # Return raw content as dialogue if parsing fails
-                return {
-                    "dialogueProtocol": transcript,
-                    "generalCondition": "",
-                    "recommendations": "",
-                    "conclusion": "Анализ завершен, но структурирование данных не удалось.",
-                    "subjective": "",
-                    "objective": "",
-                    "assessment": "",
-                    "plan": "",
-                }
-                
     except Exception as e:
-        print(f"LLM analysis error: {e}")
+        logger.exception("LLM analysis error: %s", e)
         return {"error": str(e)}
 
 
+async def _transcribe_segment(
+    websocket: WebSocket,
+    send_lock: asyncio.Lock,
+    idx: int,
+    segment: bytes,
+) -> dict:
+    """Transcribe one audio segment and push its text to the client as soon as it is ready."""
+    voiced = await asyncio.to_thread(voiced_seconds, segment)
+    if voiced is not None and voiced < MIN_VOICED_SECONDS:
+        logger.info("Segment %d has %.2fs of speech, skipping transcription", idx, voiced)
+        return {"text": "", "error": "No speech detected in the recording"}
+
+    # Once a segment has been recognized, later ones skip Whisper's language ID
+    language = getattr(websocket.state, "language", "auto")
+    async with _whisper_semaphore:
+        transcription = await transcribe_audio(segment, language=language)
+
+    if language == "auto" and transcription.get("text"):
+        detected = str(transcription.get("language", "")).lower()
+        code = WHISPER_LANGUAGE_CODES.get(detected, detected if len(detected) == 2 else None)
+        if code:
+            websocket.state.language = code
+
+    if transcription.get("text"):
+        async with send_lock:
+            await _send_json(websocket, {
+                "status": "partial",
+                "idx": idx,
+                "text": transcription["text"],
+            })
+    return transcription
+
+
+async def _receive_segments(
+    websocket: WebSocket,
+    send_lock: asyncio.Lock,
+    tasks: list[asyncio.Task],
+) -> None:
+    """
+    Receive audio from the client and start transcribing each segment on arrival.
+
+    Two client protocols are supported:
+    - a single binary message with the whole recording (legacy);
+    - a {"event": "start"} text frame, one binary message per self-contained
+      audio segment, then {"event": "end"}.
+    """
+    streaming = False
+
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000))
+
+        segment = message.get("bytes")
+        if segment is not None:
+            logger.info("Received audio segment: %d bytes", len(segment))
+            if not streaming and len(segment) >= MIN_AUDIO_BYTES:
+                # A whole recording that is too short is rejected before any upload
+                duration = await asyncio.to_thread(probe_duration, segment)
+                if duration is not None and duration < MIN_AUDIO_SECONDS:
+                    logger.info("Recording is %.2fs long, rejecting", duration)
+                    return
+            if len(segment) >= MIN_AUDIO_BYTES:
+                tasks.append(asyncio.create_task(
+                    _transcribe_segment(websocket, send_lock, len(tasks), segment)
+                ))
+            if not streaming:
+                return
+            continue
+
+        try:
+            event = orjson.loads(message.get("text") or "{}").get("event")
+        except (json.JSONDecodeError, AttributeError):
+            event = None
+
+        if event == "start":
+            streaming = True
+        elif event == "end":
+            return
+
+
+async def _acquire_session_slot(websocket: WebSocket) -> None:
+    """Wait for a free analysis slot, sending {"status": "queued"} updates meanwhile."""
+    if not _analysis_semaphore.locked():
+        await _analysis_semaphore.acquire()
+        return
+
+    ticket = object()
+    _analysis_queue.append(ticket)
+    # A single pending acquire keeps this session's place in the semaphore queue
+    acquire = asyncio.ensure_future(_analysis_semaphore.acquire())
+    try:
+        while True:
+            await _send_json(websocket, {
+                "status": "queued",
+                "position": _analysis_queue.index(ticket) + 1,
+            })
+            done, _ = await asyncio.wait({acquire}, timeout=QUEUE_STATUS_INTERVAL)
+            if done:
+                return
+    except BaseException:
+        if acquire.done() and not acquire.cancelled():
+            _analysis_semaphore.release()
+        else:
+            acquire.cancel()
+        raise
+    finally:
+        _analysis_queue.remove(ticket)
+
+
 @router.websocket("/analyze")
 async def websocket_audio_analyze(websocket: WebSocket):
     """
     WebSocket endpoint for real-time audio analysis.
     
     Flow:
-    1. Client connects
-    2. Client sends audio blob (binary)
-    3. Server transcribes audio
-    4. Server generates SOAP analysis
-    5. Server sends result back
+    1. Client connects (and receives {"status": "queued"} updates while
+       ANALYSIS_CONCURRENCY sessions are already running)
+    2. Client sends audio blob (binary), or streams audio segments
+       between {"event": "start"} and {"event": "end"} text frames
+    3. Server transcribes segments concurrently as they arrive and sends
+       a {"status": "partial"} frame for each transcribed segment
+    4. Server streams the SOAP analysis of the joined transcript, sending a
+       {"status": "partial", "field": ..., "value": ...} frame per field
+    5. Server sends the complete result with {"status": "completed"}
     """
     await websocket.accept()
-    print("WebSocket connection accepted for audio analysis")
+    logger.info("WebSocket connection accepted for audio analysis")
+    send_lock = asyncio.Lock()
+    tasks: list[asyncio.Task] = []
+    has_slot = False
     
     try:
-        # Receive audio data (binary)
-        audio_data = await websocket.receive_bytes()
-        print(f"Received audio data: {len(audio_data)} bytes")
+        await _acquire_session_slot(websocket)
+        has_slot = True
         
-        if len(audio_data) < 1000:
-            await websocket.send_json({
+        # Receive audio data (binary); each segment is transcribed on arrival
+        await _receive_segments(websocket, send_lock, tasks)
+        
+        if not tasks:
+            await _send_json(websocket, {
                 "status": "error",
                 "message": "Audio data too small. Please record a longer conversation."
             })
             return
         
-        # Step 1: Transcribe audio (auto-detect language)
-        print("Starting transcription...")
-        transcription = await transcribe_audio(audio_data, language="auto")
+        # Step 1: Wait for all segment transcriptions (auto-detect language)
+        logger.info("Waiting for %d segment transcription(s)...", len(tasks))
+        transcriptions = await asyncio.gather(*tasks)
         
-        if "error" in transcription and not transcription.get("text"):
-            await websocket.send_json({
+        texts = [t["text"] for t in transcriptions if t.get("text")]
+        if not texts:
+            await _send_json(websocket, {
                 "status": "error",
-                "message": transcription.get("error", "Transcription failed")
+                "message": transcriptions[0].get("error", "Transcription failed")
             })
             return
         
-        transcript_text = transcription.get("text", "")
-        detected_language = transcription.get("language", "unknown")
-        print(f"Transcription complete. Language: {detected_language}, Length: {len(transcript_text)}")
+        transcript_text = " ".join(texts)
+        detected_language = next(
+            (t["language"] for t in transcriptions if t.get("text") and t.get("language")),
+            "unknown",
+        )
+        logger.info("Transcription complete. Language: %s, Length: %d", detected_language, len(transcript_text))
         
         if len(transcript_text) < 20:
-            await websocket.send_json({
+            await _send_json(websocket, {
                 "status": "error",
                 "message": "Не удалось распознать речь. Убедитесь в качестве записи."
             })
             return
         
         # Step 2: Generate SOAP analysis
-        print("Generating SOAP analysis...")
-        analysis = await generate_soap_analysis(transcript_text, detected_language)
+        logger.info("Generating SOAP analysis...")
+
+        async def send_field(field: str, value: str) -> None:
+            await _send_json(websocket, {"status": "partial", "field": field, "value": value})
+
+        analysis = await generate_soap_analysis(
+            transcript_text, detected_language, on_field=send_field
+        )
         
         if "error" in analysis and not any([
             analysis.get("subjective"),
@@ -233,7 +636,7 @@ async def websocket_audio_analyze(websocket: WebSocket):
             analysis.get("plan"),
             analysis.get("dialogueProtocol"),
         ]):
-            await websocket.send_json({
+            await _send_json(websocket, {
                 "status": "error",
                 "message": analysis.get("error", "Analysis failed")
             })
@@ -243,27 +646,31 @@ async def websocket_audio_analyze(websocket: WebSocket):
         if not analysis.get("dialogueProtocol"):
             analysis["dialogueProtocol"] = transcript_text
         
-        print("Analysis complete. Sending result...")
+        logger.info("Analysis complete. Sending result...")
         
         # Send successful result
-        await websocket.send_json({
+        await _send_json(websocket, {
             "status": "completed",
             "result": analysis,
             "language": detected_language,
         })
         
     except WebSocketDisconnect:
-        print("Client disconnected from audio analysis WebSocket")
+        logger.info("Client disconnected from audio analysis WebSocket")
     except Exception as e:
-        print(f"WebSocket error: {e}")
+        logger.exception("WebSocket error: %s", e)
         try:
-            await websocket.send_json({
+            await _send_json(websocket, {
                 "status": "error",
                 "message": f"Server error: {str(e)}"
             })
         except:
             pass
     finally:
+        for task in tasks:
+            task.cancel()
+        if has_slot:
+            _analysis_semaphore.release()
         try:
             await websocket.close()
         except:
@@ -8,101 +8,135 @@ Analog: Qomek
 Team: Nursultan (master), Damir
 """
 
+import asyncio
+import logging
+from functools import lru_cache
+from itertools import chain
 from typing import List, Optional, Dict, Any
-from fastapi import APIRouter, UploadFile, File, HTTPException, Form
-from pydantic import BaseModel
-from datetime import datetime
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Request
+from fastapi.responses import Response
+from pydantic import BaseModel, ConfigDict
+from datetime import datetime, timezone
+from uuid import uuid4
 
+import numpy as np
+import orjson
+
+from app.core.config import settings
+from app.core.executor import run_cpu_bound
 from app.services.pdf_parser import (
+    PdfSource,
     extract_text_from_pdf, 
     normalize_text, 
     extract_tables_from_pdf,
     extract_lab_data_from_tables
 )
-from app.services.invivo_blood_parser import parse_invivo_blood
-from app.services.blood_nlp_extractor import extract_blood_analysis, BloodNLPExtractor, MARKER_ALIASES
+from app.services.alias_matcher import AliasMatcher
+from app.services.cache import LRUCache, content_digest, file_digest
+from app.services.invivo_blood_parser import parse_invivo_blood_with_missing
+from app.services.blood_nlp_extractor import (
+    extract_blood_analysis,
+    build_blood_analysis,
+    mentioned_markers,
+    BloodNLPExtractor,
+    MARKER_ALIASES,
+    CRITICAL_LOW_FACTOR,
+    CRITICAL_HIGH_FACTOR,
+)
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
+# Extra Russian spellings seen in lab table rows, on top of MARKER_ALIASES
+TABLE_NAME_ALIASES: Dict[str, str] = {
+    "гемоглобин": "hemoglobin",
+    "эритроциты": "rbc",
+    "лейкоциты": "wbc",
+    "тромбоциты": "platelets",
+    "гематокрит": "hematocrit",
+    "глюкоза": "glucose",
+    "холестерин": "cholesterol",
+    "холестерин общий": "cholesterol",
+    "триглицериды": "triglycerides",
+    "лпвп": "hdl",
+    "холестерин-лпвп": "hdl",
+    "хс-лпвп": "hdl",
+    "лпнп": "ldl",
+    "холестерин-лпнп": "ldl",
+    "хс-лпнп": "ldl",
+    "хс лпнп": "ldl",
+    "холестерин не-лпвп": "vldl",
+    "не-лпвп": "vldl",
+    "креатинин": "creatinine",
+    "мочевина": "urea",
+    "билирубин общий": "bilirubin_total",
+    "билирубин прямой": "bilirubin_direct",
+    "общий белок": "total_protein",
+    "альбумин": "albumin",
+    "алт": "alt",
+    "аст": "ast",
+    "ггт": "ggt",
+    "щелочная фосфатаза": "alp",
+    "железо": "iron",
+    "ферритин": "ferritin",
+    "натрий": "sodium",
+    "калий": "potassium",
+    "хлор": "chloride",
+    "кальций": "calcium",
+    "магний": "magnesium",
+    "фосфор": "phosphorus",
+    "ттг": "tsh",
+    "т4 свободный": "t4_free",
+    "св. т4": "t4_free",
+    "витамин d": "vitamin_d",
+    "витамин в12": "vitamin_b12",
+    "фолиевая кислота": "folate",
+    "с-реактивный белок": "crp",
+    "срб": "crp",
+    "соэ": "esr",
+    "нейтрофилы": "neutrophils",
+    "лимфоциты": "lymphocytes",
+    "моноциты": "monocytes",
+    "эозинофилы": "eosinophils",
+    "базофилы": "basophils",
+    "эстрадиол": "estradiol",
+    "тестостерон": "testosterone",
+    "кортизол": "cortisol",
+    "пролактин": "prolactin",
+    "инсулин": "insulin",
+    "мочевая кислота": "uric_acid",
+    "hba1c": "hba1c",
+    "гликированный": "hba1c",
+    "гликированный hb": "hba1c",
+    "гликированный гемоглобин": "hba1c",
+}
+
+assert all(alias == alias.lower() for alias in TABLE_NAME_ALIASES), "table aliases must be lowercase"
+
+# One automaton over every alias (lowercased once, at build time);
+# MARKER_ALIASES take priority on ties
+_marker_name_matcher = AliasMatcher(chain(
+    ((alias, key) for key, aliases in MARKER_ALIASES.items() for alias in aliases),
+    ((alias, key) for alias, key in TABLE_NAME_ALIASES.items()),
+), word_start=True)
+
+
 def match_marker_name(name: str) -> Optional[str]:
-    """Match a marker name from table to our standardized marker keys."""
-    name_lower = name.lower().strip()
-    
-    for marker_key, aliases in MARKER_ALIASES.items():
-        for alias in aliases:
-            if alias.lower() in name_lower or name_lower in alias.lower():
-                return marker_key
-    
-    # Direct mappings for common variations
-    direct_mappings = {
-        "гемоглобин": "hemoglobin",
-        "эритроциты": "rbc", 
-        "лейкоциты": "wbc",
-        "тромбоциты": "platelets",
-        "гематокрит": "hematocrit",
-        "глюкоза": "glucose",
-        "холестерин": "cholesterol",
-        "холестерин общий": "cholesterol",
-        "триглицериды": "triglycerides",
-        "лпвп": "hdl",
-        "холестерин-лпвп": "hdl",
-        "хс-лпвп": "hdl",
-        "лпнп": "ldl",
-        "холестерин-лпнп": "ldl",
-        "хс-лпнп": "ldl",
-        "хс лпнп": "ldl",
-        "холестерин не-лпвп": "vldl",
-        "не-лпвп": "vldl",
-        "креатинин": "creatinine",
-        "мочевина": "urea",
-        "билирубин общий": "bilirubin_total",
-        "билирубин прямой": "bilirubin_direct",
-        "общий белок": "total_protein",
-        "альбумин": "albumin",
-        "алт": "alt",
-        "аст": "ast",
-        "ггт": "ggt",
-        "щелочная фосфатаза": "alp",
-        "железо": "iron",
-        "ферритин": "ferritin",
-        "натрий": "sodium",
-        "калий": "potassium",
-        "хлор": "chloride",
-        "кальций": "calcium",
-        "магний": "magnesium",
-        "фосфор": "phosphorus",
-        "ттг": "tsh",
-        "т4 свободный": "t4_free",
-        "св. т4": "t4_free",
-        "витамин d": "vitamin_d",
-        "витамин в12": "vitamin_b12",
-        "фолиевая кислота": "folate",
-        "с-реактивный белок": "crp",
-        "срб": "crp",
-        "соэ": "esr",
-        "нейтрофилы": "neutrophils",
-        "лимфоциты": "lymphocytes",
-        "моноциты": "monocytes",
-        "эозинофилы": "eosinophils",
-        "базофилы": "basophils",
-        "эстрадиол": "estradiol",
-        "тестостерон": "testosterone",
-        "кортизол": "cortisol",
-        "пролактин": "prolactin",
-        "инсулин": "insulin",
-        "мочевая кислота": "uric_acid",
-        "hba1c": "hba1c",
-        "гликированный": "hba1c",
-        "гликированный hb": "hba1c",
-        "гликированный гемоглобин": "hba1c",
-    }
-    
-    for ru_name, marker_key in direct_mappings.items():
-        if ru_name in name_lower:
-            return marker_key
-    
-    return None
+    """
+    Match a marker name from table to our standardized marker keys.
+
+    Aliases must start a word of the name, and the longest one wins, so
+    "холестерин-лпнп" maps to ldl rather than cholesterol.
+    """
+    return _match_normalized_marker_name(name.lower().strip())
+
+
+@lru_cache(maxsize=2048)
+def _match_normalized_marker_name(name_lower: str) -> Optional[str]:
+    # Lab tables repeat the same few dozen names, so most rows are cache hits
+    return _marker_name_matcher.longest(name_lower)
 
 
 def calculate_status(value: float, ref_min: Optional[float], ref_max: Optional[float]) -> str:
@@ -110,11 +144,11 @@ def calculate_status(value: float, ref_min: Optional[float], ref_max: Optional[f
     if ref_min is None or ref_max is None:
         return "unknown"
     
-    if value < ref_min * 0.7:
+    if value < ref_min * CRITICAL_LOW_FACTOR:
         return "critical_low"
     elif value < ref_min:
         return "low"
-    elif value > ref_max * 1.5:
+    elif value > ref_max * CRITICAL_HIGH_FACTOR:
         return "critical_high"
     elif value > ref_max:
         return "high"
@@ -138,6 +172,8 @@ class BloodTestInput(BaseModel):
 
 
 class BiomarkerRisk(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     marker: str
     current_value: float
     risk_level: str
@@ -146,6 +182,8 @@ class BiomarkerRisk(BaseModel):
 
 
 class BloodAnalysisResult(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     id: str
     analyzed_at: datetime
     markers_analyzed: int
@@ -155,8 +193,64 @@ class BloodAnalysisResult(BaseModel):
     recommendations: List[str]
 
 
-@router.post("/analyze", response_model=BloodAnalysisResult)
-async def analyze_blood_test(data: BloodTestInput):
+STATUS_INTERPRETATIONS = {
+    "critical_low": "Значение критически ниже референсного диапазона",
+    "low": "Значение ниже референсного диапазона",
+    "normal": "Значение в пределах нормы",
+    "high": "Значение выше референсного диапазона",
+    "critical_high": "Значение критически выше референсного диапазона",
+}
+
+
+def assess_markers(markers: List[BloodMarker]) -> tuple[List[BiomarkerRisk], np.ndarray]:
+    """
+    Compute status and deviation for all markers at once.
+
+    Values and reference bounds are stacked into arrays so the thresholds of
+    calculate_status are applied as a single vectorized pass.
+    """
+    count = len(markers)
+    vals = np.fromiter((m.value for m in markers), dtype=np.float64, count=count)
+    lo = np.fromiter((m.reference_min for m in markers), dtype=np.float64, count=count)
+    hi = np.fromiter((m.reference_max for m in markers), dtype=np.float64, count=count)
+
+    # Deviation from the middle of the range, in half-ranges (|z| > 1 is out of range)
+    half_range = (hi - lo) / 2
+    has_width = half_range != 0
+    z = np.divide(vals - (lo + hi) / 2, half_range, out=np.zeros(count), where=has_width)
+
+    statuses = np.select(
+        [vals < lo * CRITICAL_LOW_FACTOR, vals < lo, vals > hi * CRITICAL_HIGH_FACTOR, vals > hi],
+        ["critical_low", "low", "critical_high", "high"],
+        default="normal",
+    )
+
+    # Built from already-validated input, so skip re-validation
+    risks = [
+        BiomarkerRisk.model_construct(
+            marker=marker.name,
+            current_value=value,
+            risk_level=status,
+            trend="stable",
+            # A zero-width range has no meaningful deviation, so none is shown
+            interpretation=(
+                f"{STATUS_INTERPRETATIONS[status]} (z={deviation:+.2f})" if width
+                else STATUS_INTERPRETATIONS[status]
+            ),
+        )
+        for marker, value, status, deviation, width in zip(
+            markers, vals.tolist(), statuses.tolist(), z.tolist(), has_width.tolist()
+        )
+    ]
+    return risks, statuses
+
+
+@router.post(
+    "/analyze",
+    response_model=None,
+    responses={200: {"model": BloodAnalysisResult}},
+)
+async def analyze_blood_test(data: BloodTestInput) -> Response:
     """
     Analyze blood test results using ML models.
     
@@ -166,31 +260,38 @@ async def analyze_blood_test(data: BloodTestInput):
     - Tau protein
     - Inflammatory markers
     """
-    return BloodAnalysisResult(
+    risk_factors, statuses = assess_markers(data.markers)
+    abnormal = int(np.count_nonzero(statuses != "normal"))
+
+    if np.any((statuses == "critical_low") | (statuses == "critical_high")):
+        overall_risk = "high"
+        recommendations = ["Критические отклонения показателей — требуется консультация врача"]
+    elif abnormal:
+        overall_risk = "moderate"
+        recommendations = [f"Показатели вне референсного диапазона: {abnormal}", "Рекомендуется консультация врача"]
+    else:
+        overall_risk = "low"
+        recommendations = ["Показатели в пределах нормы"]
+    recommendations += [
+        "Рекомендуется повторный анализ через 6 месяцев",
+        "Поддерживайте физическую активность",
+    ]
+
+    # Serialized directly: a response_model would re-validate the constructed result
+    result = BloodAnalysisResult.model_construct(
         id="blood_001",
-        analyzed_at=datetime.now(),
+        analyzed_at=datetime.now(timezone.utc),
         markers_analyzed=len(data.markers),
-        risk_factors=[
-            BiomarkerRisk(
-                marker="NfL",
-                current_value=12.5,
-                risk_level="normal",
-                trend="stable",
-                interpretation="Уровень нейрофиламента лёгких цепей в норме",
-            ),
-        ],
-        overall_risk="low",
+        risk_factors=risk_factors,
+        overall_risk=overall_risk,
         neuro_markers={
             "nfl_level": "normal",
             "inflammation_score": 2.3,
             "oxidative_stress": "low",
         },
-        recommendations=[
-            "Показатели в пределах нормы",
-            "Рекомендуется повторный анализ через 6 месяцев",
-            "Поддерживайте физическую активность",
-        ],
+        recommendations=recommendations,
     )
+    return Response(content=result.model_dump_json(), media_type="application/json")
 
 
 class BloodUploadResponse(BaseModel):
@@ -200,14 +301,16 @@ class BloodUploadResponse(BaseModel):
     rawTextLength: int
 
 
+_ALLOWED_UPLOAD_TYPES = frozenset({"application/pdf", "image/png", "image/jpeg"})
+
+
 @router.post("/upload")
 async def upload_blood_test_file(file: UploadFile = File(...)):
     """
     Upload blood test results file (PDF or image).
     OCR will extract markers automatically.
     """
-    allowed_types = ["application/pdf", "image/png", "image/jpeg"]
-    if file.content_type not in allowed_types:
+    if file.content_type not in _ALLOWED_UPLOAD_TYPES:
         raise HTTPException(status_code=400, detail="Invalid file type")
     
     # TODO: Implement OCR extraction
@@ -218,6 +321,45 @@ async def upload_blood_test_file(file: UploadFile = File(...)):
     }
 
 
+# Cap on PDFs parsed at once, so a burst of uploads does not thrash the GIL
+_pdf_parse_semaphore = asyncio.Semaphore(settings.PDF_PARSE_CONCURRENCY)
+
+
+async def _pdf_source(file: UploadFile, concurrent_reads: bool = False) -> tuple[PdfSource, bool]:
+    """
+    Pick how an uploaded PDF is handed to the parsers, rejecting oversized files.
+
+    Starlette already spools the upload to a temp file (on disk past 1 MB),
+    so parsers running in a thread read it in place. Large PDFs go to the
+    process pool, which needs picklable bytes, and so do passes that run
+    concurrently (a file object has a single shared read position).
+    """
+    size = file.size or 0
+    if size > settings.PDF_MAX_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"PDF is too large (limit {settings.PDF_MAX_UPLOAD_BYTES // (1024 * 1024)} MB).",
+        )
+    use_process = size >= settings.PDF_PROCESS_POOL_MIN_BYTES
+    if use_process or concurrent_reads:
+        await file.seek(0)
+        return await file.read(), use_process
+    return file.file, False
+
+
+# Parsed results by (endpoint, PDF content digest); PDFs are immutable, so
+# a retried or re-saved upload of the same file reuses the first parse
+_pdf_result_cache: LRUCache[tuple] = LRUCache(maxsize=settings.PDF_RESULT_CACHE_SIZE)
+
+
+async def _upload_digest(file: UploadFile) -> str:
+    """Digest the spooled upload off the event loop, leaving it rewound for the parsers."""
+    await file.seek(0)
+    digest = await asyncio.to_thread(file_digest, file.file)
+    await file.seek(0)
+    return digest
+
+
 @router.post("/upload-pdf", response_model=BloodUploadResponse)
 async def upload_blood_pdf(
     file: UploadFile = File(...),
@@ -230,26 +372,113 @@ async def upload_blood_pdf(
     if file.content_type != "application/pdf":
         raise HTTPException(status_code=400, detail="Invalid file type")
 
-    file_bytes = await file.read()
-    raw_text = extract_text_from_pdf(file_bytes)
-    if not raw_text.strip():
-        raise HTTPException(
-            status_code=422,
-            detail="PDF contains no extractable text. OCR is not supported.",
+    pdf_source, use_process = await _pdf_source(file)
+    cache_key = ("upload-pdf", await _upload_digest(file))
+    cached = _pdf_result_cache.get(cache_key)
+    if cached is not None:
+        extracted, missing, raw_text_length = cached
+    else:
+        async with _pdf_parse_semaphore:
+            raw_text = await run_cpu_bound(extract_text_from_pdf, pdf_source, use_process=use_process)
+        if not raw_text.strip():
+            raise HTTPException(
+                status_code=422,
+                detail="PDF contains no extractable text. OCR is not supported.",
+            )
+
+        normalized_text = await run_cpu_bound(normalize_text, raw_text)
+        extracted, missing = await run_cpu_bound(
+            parse_invivo_blood_with_missing, normalized_text, use_process=use_process
         )
-
-    normalized_text = normalize_text(raw_text)
-    extracted = parse_invivo_blood(normalized_text)
-    missing = [key for key, marker in extracted.items() if marker["value"] is None]
+        raw_text_length = len(normalized_text)
+        _pdf_result_cache.set(cache_key, (extracted, missing, raw_text_length))
 
     return BloodUploadResponse(
         patientId=patient_id,
         extracted=extracted,
         missing=missing,
-        rawTextLength=len(normalized_text),
+        rawTextLength=raw_text_length,
     )
 
 
+def merge_table_markers(markers: Dict[str, Dict[str, Any]], table_data: List[Dict[str, Any]]) -> None:
+    """Add table rows to markers where missing or where the table has a reference range."""
+    for item in table_data:
+        marker_key = match_marker_name(item["name"])
+        if marker_key:
+            existing = markers.get(marker_key)
+            # If not found in NLP or table has reference range
+            if not existing or (not existing.get("reference_min") and item.get("reference_min")):
+                markers[marker_key] = {
+                    "value": item["value"],
+                    "unit": item.get("unit"),
+                    "reference_min": item.get("reference_min"),
+                    "reference_max": item.get("reference_max"),
+                    "status": calculate_status(item["value"], item.get("reference_min"), item.get("reference_max")),
+                    "confidence": 1.0,
+                    "raw_text": item["name"],
+                }
+                logger.debug("Added from table: %s = %s", marker_key, item["value"])
+
+
+async def _run_nlp_extraction(pdf_source: PdfSource, use_process: bool) -> tuple[Dict[str, Any], str]:
+    """Run the table + NLP extraction pipeline, returning the result and normalized text."""
+    # METHOD 1: Extract tables (more accurate for structured lab reports)
+    # METHOD 2: Extract text for NLP parsing
+    # The two passes are independent, so they run side by side
+    async with _pdf_parse_semaphore:
+        tables, raw_text = await asyncio.gather(
+            run_cpu_bound(extract_tables_from_pdf, pdf_source, use_process=use_process),
+            run_cpu_bound(extract_text_from_pdf, pdf_source, use_process=use_process),
+        )
+    table_data = await run_cpu_bound(extract_lab_data_from_tables, tables)
+    
+    debug = logger.isEnabledFor(logging.DEBUG)
+    if debug:
+        logger.debug("Found %d tables, extracted %d lab rows", len(tables), len(table_data))
+        for item in table_data[:10]:
+            logger.debug("TABLE: %s", item)
+        logger.debug("Extracted text length: %d", len(raw_text))
+        logger.debug("Full text (3000 chars):\n%s", raw_text[:3000])
+    
+    if not raw_text.strip() and not table_data:
+        raise HTTPException(
+            status_code=422,
+            detail="PDF contains no extractable text. OCR is not supported yet.",
+        )
+
+    normalized_text = await run_cpu_bound(normalize_text, raw_text)
+    
+    # METHOD 3: Merge table data into extraction result
+    # Table data can provide better accuracy for values and reference ranges
+    table_markers: Dict[str, Dict[str, Any]] = {}
+    merge_table_markers(table_markers, table_data)
+    if len(table_markers) >= settings.TABLE_COVERAGE_MIN_MARKERS and (
+        await run_cpu_bound(mentioned_markers, normalized_text) <= table_markers.keys()
+    ):
+        # Well-structured report: the tables cover every marker named in the
+        # text, so the NLP pass would find nothing more; skip it
+        logger.debug("Tables cover %d markers, skipping NLP extraction", len(table_markers))
+        extraction_result = build_blood_analysis(table_markers, normalized_text)
+    else:
+        extraction_result = await run_cpu_bound(extract_blood_analysis, normalized_text, use_process=use_process)
+        merge_table_markers(extraction_result["markers"], table_data)
+    
+    # Log marker count and reference ranges (skipped entirely unless debugging)
+    if debug:
+        found_markers = []
+        for k, v in extraction_result["markers"].items():
+            if v and isinstance(v, dict) and v.get("value") is not None:
+                found_markers.append(k)
+                logger.debug(
+                    "%s: value=%s, unit=%s, ref=%s-%s, status=%s",
+                    k, v.get("value"), v.get("unit"), v.get("reference_min"), v.get("reference_max"), v.get("status"),
+                )
+        logger.debug("Total found %d markers: %s", len(found_markers), found_markers[:15])
+
+    return extraction_result, normalized_text
+
+
 class NLPExtractionResponse(BaseModel):
     """Response for NLP-based blood analysis extraction."""
     patientId: str
@@ -304,67 +533,15 @@ async def extract_blood_nlp(
     if file.content_type != "application/pdf":
         raise HTTPException(status_code=400, detail="Invalid file type. Only PDF supported.")
 
-    file_bytes = await file.read()
-    
-    # Debug logging
-    print(f"[DEBUG] PDF size: {len(file_bytes)} bytes")
-    
-    # METHOD 1: Extract tables (more accurate for structured lab reports)
-    tables = extract_tables_from_pdf(file_bytes)
-    table_data = extract_lab_data_from_tables(tables)
-    print(f"[DEBUG] Found {len(tables)} tables, extracted {len(table_data)} lab rows")
-    
-    for item in table_data[:10]:
-        print(f"[DEBUG] TABLE: {item}")
+    pdf_source, use_process = await _pdf_source(file, concurrent_reads=True)
+    logger.debug("PDF size: %s bytes", file.size)
     
-    # METHOD 2: Extract text for NLP parsing
-    raw_text = extract_text_from_pdf(file_bytes)
-    print(f"[DEBUG] Extracted text length: {len(raw_text)}")
-    print(f"[DEBUG] First 500 chars: {raw_text[:500]}")
-    
-    # Print full text for debugging (first 3000 chars)
-    print(f"[DEBUG] === FULL TEXT (3000 chars) ===")
-    print(raw_text[:3000])
-    print(f"[DEBUG] === END FULL TEXT ===")
-    
-    if not raw_text.strip() and not table_data:
-        raise HTTPException(
-            status_code=422,
-            detail="PDF contains no extractable text. OCR is not supported yet.",
-        )
-
-    normalized_text = normalize_text(raw_text)
-    extraction_result = extract_blood_analysis(normalized_text)
-    
-    # METHOD 3: Merge table data into extraction result
-    # Table data can provide better accuracy for values and reference ranges
-    for item in table_data:
-        marker_key = match_marker_name(item["name"])
-        if marker_key:
-            existing = extraction_result["markers"].get(marker_key)
-            # If not found in NLP or table has reference range
-            if not existing or (not existing.get("reference_min") and item.get("reference_min")):
-                extraction_result["markers"][marker_key] = {
-                    "value": item["value"],
-                    "unit": item.get("unit"),
-                    "reference_min": item.get("reference_min"),
-                    "reference_max": item.get("reference_max"),
-                    "status": calculate_status(item["value"], item.get("reference_min"), item.get("reference_max")),
-                    "confidence": 1.0,
-                    "raw_text": item["name"],
-                }
-                print(f"[DEBUG] Added from table: {marker_key} = {item['value']}")
-    
-    # Debug: log marker count and reference ranges
-    found_markers = [k for k, v in extraction_result["markers"].items() if v and isinstance(v, dict) and v.get("value") is not None]
-    print(f"[DEBUG] Total found {len(found_markers)} markers: {found_markers[:15]}")
-    
-    # Log markers with PDF-extracted references
-    for k, v in extraction_result["markers"].items():
-        if v and isinstance(v, dict) and v.get("value") is not None:
-            ref_min = v.get("reference_min")
-            ref_max = v.get("reference_max")
-            print(f"[DEBUG] {k}: value={v.get('value')}, unit={v.get('unit')}, ref={ref_min}-{ref_max}, status={v.get('status')}")
+    cache_key = ("extract-nlp", await _upload_digest(file))
+    cached = _pdf_result_cache.get(cache_key)
+    if cached is None:
+        cached = await _run_nlp_extraction(pdf_source, use_process)
+        _pdf_result_cache.set(cache_key, cached)
+    extraction_result, normalized_text = cached
     
     saved = False
     if save_to_profile and patient_id != "unknown":
@@ -404,73 +581,134 @@ async def save_blood_analysis_to_profile(request: SaveBloodAnalysisRequest):
         "message": "Blood analysis saved to patient profile",
         "patientId": request.patient_id,
         "markersCount": len([k for k, v in request.markers.items() if v and v.get("value")]),
-        "analysisId": f"blood_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+        "analysisId": f"blood_{uuid4().hex}",
     }
 
 
+# Static catalogues, serialized once at import so the GET handlers return bytes
+SUPPORTED_MARKERS = {
+    "categories": {
+        "hematology": {
+            "name": "Общий анализ крови / Complete Blood Count",
+            "markers": [
+                "hemoglobin", "rbc", "wbc", "platelets", "hematocrit",
+                "mcv", "mch", "mchc", "rdw", "mpv", "esr",
+                "neutrophils", "lymphocytes", "monocytes", "eosinophils", "basophils"
+            ]
+        },
+        "biochemistry": {
+            "name": "Биохимия / Biochemistry",
+            "markers": ["glucose", "hba1c", "insulin"]
+        },
+        "lipids": {
+            "name": "Липидный профиль / Lipid Panel",
+            "markers": ["cholesterol", "hdl", "ldl", "vldl", "triglycerides"]
+        },
+        "liver": {
+            "name": "Печёночные пробы / Liver Function",
+            "markers": ["alt", "ast", "ggt", "alp", "bilirubin_total", "bilirubin_direct", "albumin", "total_protein"]
+        },
+        "kidney": {
+            "name": "Почечные показатели / Kidney Function",
+            "markers": ["creatinine", "urea", "uric_acid", "gfr", "cystatin_c"]
+        },
+        "electrolytes": {
+            "name": "Электролиты / Electrolytes",
+            "markers": ["sodium", "potassium", "chloride", "calcium", "magnesium", "phosphorus", "iron", "ferritin", "transferrin"]
+        },
+        "thyroid": {
+            "name": "Щитовидная железа / Thyroid",
+            "markers": ["tsh", "t3", "t4", "t3_free", "t4_free"]
+        },
+        "vitamins": {
+            "name": "Витамины / Vitamins",
+            "markers": ["vitamin_d", "vitamin_b12", "folate"]
+        },
+        "inflammation": {
+            "name": "Воспаление / Inflammation",
+            "markers": ["crp", "procalcitonin", "il6"]
+        },
+        "coagulation": {
+            "name": "Коагулограмма / Coagulation",
+            "markers": ["pt", "inr", "aptt", "fibrinogen", "d_dimer"]
+        },
+        "hormones": {
+            "name": "Гормоны / Hormones",
+            "markers": ["cortisol", "testosterone", "estradiol", "progesterone", "prolactin"]
+        },
+        "tumor_markers": {
+            "name": "Онкомаркеры / Tumor Markers",
+            "markers": ["psa", "cea", "afp", "ca125", "ca199"]
+        }
+    },
+    "total_markers": 60,
+    "languages": ["RU", "KZ", "EN"]
+}
+
+TRACKED_MARKERS = {
+    "markers": [
+        {
+            "name": "Neurofilament Light Chain (NfL)",
+            "description": "Маркер повреждения нейронов",
+            "unit": "pg/mL",
+            "reference_range": {"min": 0, "max": 20},
+            "relevance": "high",
+        },
+        {
+            "name": "Amyloid-beta 42",
+            "description": "Связан с болезнью Альцгеймера",
+            "unit": "pg/mL",
+            "reference_range": {"min": 500, "max": 1000},
+            "relevance": "high",
+        },
+        {
+            "name": "Tau protein",
+            "description": "Маркер нейродегенерации",
+            "unit": "pg/mL",
+            "reference_range": {"min": 0, "max": 400},
+            "relevance": "high",
+        },
+        {
+            "name": "C-Reactive Protein (CRP)",
+            "description": "Маркер воспаления",
+            "unit": "mg/L",
+            "reference_range": {"min": 0, "max": 3},
+            "relevance": "medium",
+        },
+        {
+            "name": "Homocysteine",
+            "description": "Связан с когнитивными нарушениями",
+            "unit": "μmol/L",
+            "reference_range": {"min": 5, "max": 15},
+            "relevance": "medium",
+        },
+    ]
+}
+
+_SUPPORTED_MARKERS_BYTES = orjson.dumps(SUPPORTED_MARKERS)
+_TRACKED_MARKERS_BYTES = orjson.dumps(TRACKED_MARKERS)
+_SUPPORTED_MARKERS_ETAG = f'"{content_digest(_SUPPORTED_MARKERS_BYTES)}"'
+_TRACKED_MARKERS_ETAG = f'"{content_digest(_TRACKED_MARKERS_BYTES)}"'
+STATIC_CACHE_HEADERS = {"Cache-Control": "public, max-age=3600"}
+
+
+def _static_json_response(request: Request, body: bytes, etag: str) -> Response:
+    """Serve a precomputed catalogue, answering 304 when the client's copy is current."""
+    headers = {**STATIC_CACHE_HEADERS, "ETag": etag}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if etag in tags or "*" in tags:
+            return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 @router.get("/supported-markers")
-async def get_supported_markers():
+async def get_supported_markers(request: Request):
     """
     Get list of all supported blood markers with categories.
     """
-    return {
-        "categories": {
-            "hematology": {
-                "name": "Общий анализ крови / Complete Blood Count",
-                "markers": [
-                    "hemoglobin", "rbc", "wbc", "platelets", "hematocrit",
-                    "mcv", "mch", "mchc", "rdw", "mpv", "esr",
-                    "neutrophils", "lymphocytes", "monocytes", "eosinophils", "basophils"
-                ]
-            },
-            "biochemistry": {
-                "name": "Биохимия / Biochemistry",
-                "markers": ["glucose", "hba1c", "insulin"]
-            },
-            "lipids": {
-                "name": "Липидный профиль / Lipid Panel",
-                "markers": ["cholesterol", "hdl", "ldl", "vldl", "triglycerides"]
-            },
-            "liver": {
-                "name": "Печёночные пробы / Liver Function",
-                "markers": ["alt", "ast", "ggt", "alp", "bilirubin_total", "bilirubin_direct", "albumin", "total_protein"]
-            },
-            "kidney": {
-                "name": "Почечные показатели / Kidney Function",
-                "markers": ["creatinine", "urea", "uric_acid", "gfr", "cystatin_c"]
-            },
-            "electrolytes": {
-                "name": "Электролиты / Electrolytes",
-                "markers": ["sodium", "potassium", "chloride", "calcium", "magnesium", "phosphorus", "iron", "ferritin", "transferrin"]
-            },
-            "thyroid": {
-                "name": "Щитовидная железа / Thyroid",
-                "markers": ["tsh", "t3", "t4", "t3_free", "t4_free"]
-            },
-            "vitamins": {
-                "name": "Витамины / Vitamins",
-                "markers": ["vitamin_d", "vitamin_b12", "folate"]
-            },
-            "inflammation": {
-                "name": "Воспаление / Inflammation",
-                "markers": ["crp", "procalcitonin", "il6"]
-            },
-            "coagulation": {
-                "name": "Коагулограмма / Coagulation",
-                "markers": ["pt", "inr", "aptt", "fibrinogen", "d_dimer"]
-            },
-            "hormones": {
-                "name": "Гормоны / Hormones",
-                "markers": ["cortisol", "testosterone", "estradiol", "progesterone", "prolactin"]
-            },
-            "tumor_markers": {
-                "name": "Онкомаркеры / Tumor Markers",
-                "markers": ["psa", "cea", "afp", "ca125", "ca199"]
-            }
-        },
-        "total_markers": 60,
-        "languages": ["RU", "KZ", "EN"]
-    }
+    return _static_json_response(request, _SUPPORTED_MARKERS_BYTES, _SUPPORTED_MARKERS_ETAG)
 
 
 @router.get("/history", response_model=List[BloodAnalysisResult])
@@ -486,47 +724,9 @@ async def get_analysis_result(analysis_id: str):
 
 
 @router.get("/markers")
-async def get_tracked_markers():
+async def get_tracked_markers(request: Request):
     """Get list of tracked biomarkers and their reference ranges"""
-    return {
-        "markers": [
-            {
-                "name": "Neurofilament Light Chain (NfL)",
-                "description": "Маркер повреждения нейронов",
-                "unit": "pg/mL",
-                "reference_range": {"min": 0, "max": 20},
-                "relevance": "high",
-            },
-            {
-                "name": "Amyloid-beta 42",
-                "description": "Связан с болезнью Альцгеймера",
-                "unit": "pg/mL",
-                "reference_range": {"min": 500, "max": 1000},
-                "relevance": "high",
-            },
-            {
-                "name": "Tau protein",
-                "description": "Маркер нейродегенерации",
-                "unit": "pg/mL",
-                "reference_range": {"min": 0, "max": 400},
-                "relevance": "high",
-            },
-            {
-                "name": "C-Reactive Protein (CRP)",
-                "description": "Маркер воспаления",
-                "unit": "mg/L",
-                "reference_range": {"min": 0, "max": 3},
-                "relevance": "medium",
-            },
-            {
-                "name": "Homocysteine",
-                "description": "Связан с когнитивными нарушениями",
-                "unit": "μmol/L",
-                "reference_range": {"min": 5, "max": 15},
-                "relevance": "medium",
-            },
-        ]
-    }
+    return _static_json_response(request, _TRACKED_MARKERS_BYTES, _TRACKED_MARKERS_ETAG)
 
 
 @router.get("/trends/{marker_name}")
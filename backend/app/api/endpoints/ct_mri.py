@@ -13,6 +13,10 @@ from pydantic import BaseModel
 
 router = APIRouter()
 
+# Listed in the order shown to clients; membership is checked against the set
+ALLOWED_SCAN_TYPES = ("image/png", "image/jpeg", "application/dicom", "application/octet-stream")
+_ALLOWED_SCAN_TYPE_SET = frozenset(ALLOWED_SCAN_TYPES)
+
 
 class ScanAnalysisRequest(BaseModel):
     scan_type: str  # "ct" or "mri"
@@ -50,11 +54,10 @@ async def analyze_scan(
     Supported formats: DICOM, NIfTI, PNG, JPEG
     """
     # Validate file type
-    allowed_types = ["image/png", "image/jpeg", "application/dicom", "application/octet-stream"]
-    if file.content_type not in allowed_types:
+    if file.content_type not in _ALLOWED_SCAN_TYPE_SET:
         raise HTTPException(
             status_code=400,
-            detail=f"Invalid file type. Allowed: {allowed_types}"
+            detail=f"Invalid file type. Allowed: {list(ALLOWED_SCAN_TYPES)}"
         )
     
     # TODO: Implement actual ML model inference
@@ -18,6 +18,7 @@ from app.services.encounters import (
     append_message,
     complete_encounter,
     create_encounter,
+    encounter_state,
     get_encounter,
     latest_active_or_paused,
     list_encounters,
@@ -50,18 +51,17 @@ def _status_values(values: Iterable[EncounterStatus]) -> list[str]:
 
 
 def _to_response(encounter: Encounter) -> EncounterResponse:
-    return EncounterResponse.model_validate(
-        {
-            "id": encounter.id,
-            "user_id": encounter.user_id,
-            "status": encounter.status,
-            "state": encounter.state_json,
-            "created_at": encounter.created_at,
-            "updated_at": encounter.updated_at,
-            "paused_at": encounter.paused_at,
-            "resumed_at": encounter.resumed_at,
-            "last_activity_at": encounter.last_activity_at,
-        }
+    # ORM rows are already typed, so skip validation; only the status needs the enum
+    return EncounterResponse.model_construct(
+        id=encounter.id,
+        user_id=encounter.user_id,
+        status=EncounterStatus(encounter.status),
+        state=encounter_state(encounter),
+        created_at=encounter.created_at,
+        updated_at=encounter.updated_at,
+        paused_at=encounter.paused_at,
+        resumed_at=encounter.resumed_at,
+        last_activity_at=encounter.last_activity_at,
     )
 
 
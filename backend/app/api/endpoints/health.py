@@ -2,20 +2,22 @@
 Health check endpoints
 """
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
 
 router = APIRouter()
 
 
 @router.get("")
-async def health_check():
+async def health_check(response: Response):
     """Basic health check"""
+    response.headers["Cache-Control"] = "no-store"
     return {"status": "ok"}
 
 
 @router.get("/detailed")
-async def detailed_health_check():
+async def detailed_health_check(response: Response):
     """Detailed health check with service status"""
+    response.headers["Cache-Control"] = "no-store"
     return {
         "status": "ok",
         "services": {
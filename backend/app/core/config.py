@@ -14,6 +14,7 @@ class Settings(BaseSettings):
     VERSION: str = "0.1.0"
     API_V1_STR: str = "/api/v1"
     DEBUG: bool = True
+    LOG_LEVEL: str = "INFO"
     
     # CORS
     CORS_ORIGINS: List[str] = [
@@ -24,6 +25,9 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = "sqlite+aiosqlite:///./amanai.db"
+    # Pool for server databases (PostgreSQL); SQLite ignores these
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 10
     
     # Redis
     REDIS_URL: str = "redis://localhost:6379"
@@ -36,6 +40,19 @@ class Settings(BaseSettings):
     # AI Services
     MODEL_PATH: str = "./models"
     
+    # SOAP analysis cache (in memory, exact transcript matches only)
+    SOAP_CACHE_MAX_ENTRIES: int = 5000
+    
+    # PDFs at least this large are parsed in a worker process
+    PDF_PROCESS_POOL_MIN_BYTES: int = 5 * 1024 * 1024
+    PDF_PARSE_CONCURRENCY: int = 4
+    # extract-nlp skips the NLP text pass when tables yield this many markers
+    TABLE_COVERAGE_MIN_MARKERS: int = 40
+    # Larger PDF uploads are rejected with 413
+    PDF_MAX_UPLOAD_BYTES: int = 50 * 1024 * 1024
+    # Parsed results kept per PDF content digest, so re-uploads skip parsing
+    PDF_RESULT_CACHE_SIZE: int = 256
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
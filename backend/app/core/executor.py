@@ -0,0 +1,56 @@
+"""
+Offloading of blocking work from the event loop.
+
+Short CPU-bound jobs run in the default thread pool; heavy ones (large PDFs)
+go to a lazily created process pool so they do not hold the GIL while
+WebSocket sessions are being served.
+
+Workers are spawned rather than forked: by the time the pool is created the
+process runs the logging listener and event-loop threads, and a forked child
+could inherit one of their locks in a held state and deadlock.
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional, TypeVar
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        # No more workers than PDF parses that may run at once
+        _process_pool = ProcessPoolExecutor(
+            max_workers=max(1, min(settings.PDF_PARSE_CONCURRENCY, os.cpu_count() or 1)),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _process_pool
+
+
+async def run_cpu_bound(func: Callable[..., T], *args: Any, use_process: bool = False) -> T:
+    """
+    Run a blocking function without blocking the event loop.
+
+    With use_process=True the call is executed in a worker process, so func
+    and its arguments must be picklable (module-level functions, bytes, str).
+    """
+    if not use_process:
+        return await asyncio.to_thread(func, *args)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_process_pool(), partial(func, *args))
+
+
+def shutdown_executor() -> None:
+    """Stop the worker processes (called on application shutdown)."""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
@@ -0,0 +1,49 @@
+"""
+Non-blocking logging setup.
+
+A QueueHandler on the root logger puts records on an in-memory queue and
+a QueueListener thread writes them to stderr, so request handlers never
+block on terminal/stdout I/O. The "app" logger keeps propagating, so its
+records still reach any other handler attached to the root (pytest's
+caplog, handlers added by uvicorn or the deployment).
+"""
+
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+
+
+def setup_logging(level: int | str = logging.INFO) -> None:
+    """Route application logs through a background listener thread."""
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+
+    log_queue: queue.Queue = queue.Queue(-1)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    logging.getLogger("app").setLevel(level)
+    _queue_handler = QueueHandler(log_queue)
+    logging.getLogger().addHandler(_queue_handler)
+
+    _listener = QueueListener(log_queue, stream_handler)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener, _queue_handler
+    # Detach first so no record is queued after the listener has stopped
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
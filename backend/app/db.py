@@ -4,9 +4,13 @@ Database setup using SQLAlchemy async engine and session.
 
 from __future__ import annotations
 
+import json
+import re
 from contextlib import asynccontextmanager
-from typing import AsyncIterator
+from typing import Any, AsyncIterator
 
+import orjson
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
@@ -22,11 +26,68 @@ class Base(DeclarativeBase):
     """Base class for ORM models."""
 
 
+def _set_sqlite_pragmas(dbapi_connection, _connection_record) -> None:
+    """Let readers proceed during writes and fsync less often (dev/test only)."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+# 20+ digits in a row: possibly an integer wider than 64 bits
+_LONG_DIGITS_RE = re.compile(r"\d{20}")
+
+
+def _json_serializer(value: Any) -> str:
+    """Encode JSON columns with orjson; non-str keys are stringified like json.dumps does."""
+    try:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+    except TypeError:
+        # User-supplied state may hold what only json.dumps accepts (e.g. ints
+        # wider than 64 bits)
+        return json.dumps(value)
+
+
+def _json_deserializer(value: str) -> Any:
+    """Decode JSON columns with orjson, or json.loads where orjson would turn a wide int into a float."""
+    if _LONG_DIGITS_RE.search(value):
+        return json.loads(value)
+    return orjson.loads(value)
+
+
 def _make_engine() -> AsyncEngine:
+    """
+    Build the async engine for DATABASE_URL.
+
+    SQLite serializes every write and is meant for development and tests;
+    production should point DATABASE_URL at PostgreSQL (asyncpg), which
+    gets a pooled engine. SQL echo stays off: statement logging is enabled
+    through the "sqlalchemy.engine" logger when needed. JSON columns (the
+    encounter transcript in particular) are encoded and decoded with orjson.
+    """
+    json_options = {
+        "json_serializer": _json_serializer,
+        "json_deserializer": _json_deserializer,
+    }
+    if settings.DATABASE_URL.startswith("sqlite"):
+        engine = create_async_engine(
+            settings.DATABASE_URL,
+            echo=False,
+            future=True,
+            connect_args={"check_same_thread": False},
+            **json_options,
+        )
+        event.listen(engine.sync_engine, "connect", _set_sqlite_pragmas)
+        return engine
+
     return create_async_engine(
         settings.DATABASE_URL,
-        echo=settings.DEBUG,
+        echo=False,
         future=True,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_pre_ping=True,
+        **json_options,
     )
 
 
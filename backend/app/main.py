@@ -5,23 +5,40 @@ Main application entry point.
 
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
 
 from app.api.router import api_router
 from app.api.endpoints import analysis
 from app.core.config import settings
+from app.core.executor import shutdown_executor
+from app.core.logging_config import setup_logging, shutdown_logging
 from app.db import init_db, shutdown_db
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events."""
+    setup_logging(settings.LOG_LEVEL)
     print(f"Starting Aman AI Backend v{settings.VERSION}")
     await init_db()
     yield
+    await analysis.close_http_client()
+    shutdown_executor()
     await shutdown_db()
     print("Shutting down Aman AI Backend")
+    shutdown_logging()
+
+
+class _ORJSONResponse(ORJSONResponse):
+    """ORJSONResponse that uses the standard encoder for content orjson rejects (e.g. ints wider than 64 bits)."""
+
+    def render(self, content) -> bytes:
+        try:
+            return super().render(content)
+        except TypeError:
+            return JSONResponse.render(self, content)
 
 
 app = FastAPI(
@@ -32,6 +49,7 @@ app = FastAPI(
     docs_url=f"{settings.API_V1_STR}/docs",
     redoc_url=f"{settings.API_V1_STR}/redoc",
     lifespan=lifespan,
+    default_response_class=_ORJSONResponse,
 )
 
 # CORS middleware
@@ -51,8 +69,9 @@ app.include_router(analysis.router, prefix="/ws", tags=["WebSocket Analysis"])
 
 
 @app.get("/health")
-async def health_check():
+async def health_check(response: Response):
     """Health check endpoint."""
+    response.headers["Cache-Control"] = "no-store"
     return {
         "status": "healthy",
         "version": settings.VERSION,
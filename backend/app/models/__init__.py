@@ -1,6 +1,6 @@
 """ORM models."""
 
 from app.db import Base
-from app.models.encounter import Encounter
+from app.models.encounter import Encounter, EncounterMessage
 
-__all__ = ["Base", "Encounter"]
+__all__ = ["Base", "Encounter", "EncounterMessage"]
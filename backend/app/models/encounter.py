@@ -4,8 +4,8 @@ from datetime import datetime, timezone
 from typing import Any
 from uuid import uuid4
 
-from sqlalchemy import JSON, DateTime, String
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import JSON, DateTime, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db import Base
 
@@ -17,6 +17,10 @@ def utcnow() -> datetime:
 
 class Encounter(Base):
     __tablename__ = "encounters"
+    # Per-user listings filter on user_id and order by recent activity
+    __table_args__ = (
+        Index("ix_encounters_user_activity", "user_id", "last_activity_at", "created_at"),
+    )
 
     id: Mapped[str] = mapped_column(
         String(36),
@@ -44,3 +48,31 @@ class Encounter(Base):
         DateTime(timezone=True),
         index=True,
     )
+
+    # Appended turns live in their own table so adding one is a single
+    # INSERT instead of rewriting the whole state_json transcript
+    messages: Mapped[list["EncounterMessage"]] = relationship(
+        back_populates="encounter",
+        order_by="EncounterMessage.id",
+        lazy="selectin",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
+
+class EncounterMessage(Base):
+    __tablename__ = "encounter_messages"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    encounter_id: Mapped[str] = mapped_column(
+        String(36),
+        ForeignKey("encounters.id", ondelete="CASCADE"),
+        index=True,
+        nullable=False,
+    )
+    role: Mapped[str] = mapped_column(String(32), nullable=False)
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+    # ISO-8601 string, exactly as returned in state["messages"]
+    timestamp: Mapped[str] = mapped_column(String(64), nullable=False)
+
+    encounter: Mapped[Encounter] = relationship(back_populates="messages")
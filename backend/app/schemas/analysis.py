@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from typing import Any
+
+from pydantic import BaseModel, ConfigDict, field_validator
+
+
+class SOAPResult(BaseModel):
+    """Structured note returned by the SOAP analysis LLM."""
+
+    model_config = ConfigDict(extra="allow")
+
+    subjective: str = ""
+    objective: str = ""
+    assessment: str = ""
+    differentialDiagnosis: str = ""
+    plan: str = ""
+    generalCondition: str = ""
+    dialogueProtocol: str = ""
+    recommendations: str = ""
+    conclusion: str = ""
+
+    @field_validator("*", mode="before")
+    @classmethod
+    def _coerce_to_text(cls, value: Any) -> Any:
+        """Accept null, lists and objects, which models sometimes return, as text."""
+        if value is None:
+            return ""
+        if isinstance(value, list):
+            return "\n".join(str(cls._coerce_to_text(item)) for item in value)
+        if isinstance(value, dict):
+            return "\n".join(f"{key}: {cls._coerce_to_text(item)}" for key, item in value.items())
+        if isinstance(value, (int, float)):
+            return str(value)
+        return value
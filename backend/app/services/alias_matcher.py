@@ -0,0 +1,132 @@
+"""
+Multi-pattern alias matching for lab marker names.
+
+All aliases are compiled into one Aho-Corasick automaton, so a text is
+scanned once regardless of how many aliases there are. pyahocorasick is
+used when installed; otherwise an equivalent pure-Python automaton is built.
+"""
+
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import ahocorasick
+except ImportError:  # pragma: no cover - pure-Python automaton is used instead
+    ahocorasick = None  # type: ignore
+
+# (alias length, registration order, marker key)
+_Output = Tuple[int, int, str]
+
+
+class AliasMatcher:
+    """
+    Find which marker keys' aliases occur in a text.
+
+    Aliases are registered in priority order: when the same alias is given
+    twice the first key wins, and among equally long matches the alias
+    registered first is preferred. With word_start=True an alias only counts
+    when it begins a word (prefix semantics per word), so short aliases such
+    as "ht" are not found inside unrelated words.
+    """
+
+    def __init__(self, aliases: Iterable[Tuple[str, str]], word_start: bool = False):
+        self.word_start = word_start
+        self._outputs_by_alias: Dict[str, _Output] = {}
+        for alias, key in aliases:
+            alias = alias.lower()
+            if alias and alias not in self._outputs_by_alias:
+                self._outputs_by_alias[alias] = (len(alias), len(self._outputs_by_alias), key)
+
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for alias, output in self._outputs_by_alias.items():
+                self._automaton.add_word(alias, output)
+            self._automaton.make_automaton()
+        else:
+            self._automaton = None
+            self._build()
+
+    def _build(self) -> None:
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[_Output]] = [[]]
+        for alias, output in self._outputs_by_alias.items():
+            node = 0
+            for char in alias:
+                nxt = goto[node].get(char)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[node][char] = nxt
+                    goto.append({})
+                    outputs.append([])
+                node = nxt
+            outputs[node].append(output)
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in goto[node].items():
+                queue.append(child)
+                state = fail[node]
+                while state and char not in goto[state]:
+                    state = fail[state]
+                fail[child] = goto[state].get(char, 0)
+                outputs[child].extend(outputs[fail[child]])
+
+        self._goto = goto
+        self._fail = fail
+        self._outputs = outputs
+
+    def _iter_outputs(self, text: str) -> Iterator[Tuple[int, _Output]]:
+        """Yield (end index, output) for every alias occurrence in text."""
+        if self._automaton is not None:
+            yield from self._automaton.iter(text)
+            return
+
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        node = 0
+        for idx, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for output in outputs[node]:
+                yield idx, output
+
+    def _iter_matches(self, text: str) -> Iterator[Tuple[int, _Output]]:
+        """Like _iter_outputs, minus matches that do not begin a word when word_start is set."""
+        if not self.word_start:
+            yield from self._iter_outputs(text)
+            return
+        for end, output in self._iter_outputs(text):
+            start = end + 1 - output[0]
+            if start == 0 or not text[start - 1].isalnum():
+                yield end, output
+
+    def find_all(self, text: str) -> List[Tuple[int, int, str]]:
+        """Return (start, end, key) for every alias occurrence in lowercase text."""
+        return [
+            (end + 1 - length, end + 1, key)
+            for end, (length, _, key) in self._iter_matches(text)
+        ]
+
+    def keys_in(self, text: str) -> set[str]:
+        """Return the set of marker keys with at least one alias in lowercase text."""
+        return {key for _, (_, _, key) in self._iter_matches(text)}
+
+    def exact(self, text: str) -> Optional[str]:
+        """Return the key whose alias is exactly the lowercase text, if any."""
+        output = self._outputs_by_alias.get(text)
+        return output[2] if output is not None else None
+
+    def longest(self, text: str) -> Optional[str]:
+        """Return the key of the longest alias found in lowercase text, if any."""
+        # A text that is itself an alias cannot contain a longer one
+        key = self.exact(text)
+        if key is not None:
+            return key
+
+        best: Optional[_Output] = None
+        for _, output in self._iter_matches(text):
+            if best is None or (output[0], -output[1]) > (best[0], -best[1]):
+                best = output
+        return best[2] if best is not None else None
@@ -0,0 +1,109 @@
+"""
+Audio preprocessing for transcription.
+"""
+
+import io
+import logging
+from typing import Optional
+
+try:
+    import av
+    from av.audio.resampler import AudioResampler
+except ImportError:  # pragma: no cover - recordings are uploaded as-is without PyAV
+    av = None  # type: ignore
+    AudioResampler = None  # type: ignore
+
+try:
+    import webrtcvad
+except ImportError:  # pragma: no cover - speech detection is skipped without it
+    webrtcvad = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# Whisper works on 16 kHz mono internally; anything richer is wasted upload
+TARGET_SAMPLE_RATE = 16000
+TARGET_BIT_RATE = 24000
+
+# webrtcvad accepts 10/20/30 ms frames of 16-bit mono PCM
+VAD_FRAME_MS = 20
+VAD_AGGRESSIVENESS = 3
+
+
+def transcode_16k_mono(audio_data: bytes) -> Optional[bytes]:
+    """
+    Re-encode a recording as 16 kHz mono Opus in an Ogg container.
+
+    Returns None when PyAV is not installed or the input cannot be decoded,
+    in which case the caller should upload the original bytes.
+    """
+    if av is None:
+        return None
+
+    out_buf = io.BytesIO()
+    try:
+        with av.open(io.BytesIO(audio_data)) as src, av.open(out_buf, "w", format="ogg") as dst:
+            stream = dst.add_stream("libopus", rate=TARGET_SAMPLE_RATE)
+            stream.layout = "mono"
+            stream.bit_rate = TARGET_BIT_RATE
+            resampler = AudioResampler(format="s16", layout="mono", rate=TARGET_SAMPLE_RATE)
+
+            for frame in src.decode(audio=0):
+                for resampled in resampler.resample(frame):
+                    dst.mux(stream.encode(resampled))
+            for resampled in resampler.resample(None):
+                dst.mux(stream.encode(resampled))
+            dst.mux(stream.encode(None))
+    except Exception as e:
+        logger.warning("Audio transcode failed, uploading original: %s", e)
+        return None
+
+    return out_buf.getvalue()
+
+
+def probe_duration(audio_data: bytes) -> Optional[float]:
+    """
+    Return the recording length in seconds from the container header.
+
+    Returns None when PyAV is not installed or the duration is unknown
+    (e.g. MediaRecorder webm without a duration element).
+    """
+    if av is None:
+        return None
+    try:
+        with av.open(io.BytesIO(audio_data)) as container:
+            if container.duration is None:
+                return None
+            return container.duration / av.time_base
+    except Exception as e:
+        logger.warning("Audio probe failed: %s", e)
+        return None
+
+
+def voiced_seconds(audio_data: bytes) -> Optional[float]:
+    """
+    Return how many seconds of the recording contain speech according to VAD.
+
+    Returns None when PyAV or webrtcvad is unavailable or decoding fails.
+    """
+    if av is None or webrtcvad is None:
+        return None
+
+    vad = webrtcvad.Vad(VAD_AGGRESSIVENESS)
+    frame_bytes = TARGET_SAMPLE_RATE * VAD_FRAME_MS // 1000 * 2
+    pcm = bytearray()
+    voiced_frames = 0
+    try:
+        with av.open(io.BytesIO(audio_data)) as src:
+            resampler = AudioResampler(format="s16", layout="mono", rate=TARGET_SAMPLE_RATE)
+            for frame in src.decode(audio=0):
+                for resampled in resampler.resample(frame):
+                    pcm += bytes(resampled.planes[0])[: resampled.samples * 2]
+                    while len(pcm) >= frame_bytes:
+                        if vad.is_speech(bytes(pcm[:frame_bytes]), TARGET_SAMPLE_RATE):
+                            voiced_frames += 1
+                        del pcm[:frame_bytes]
+    except Exception as e:
+        logger.warning("Voice activity detection failed: %s", e)
+        return None
+
+    return voiced_frames * VAD_FRAME_MS / 1000
@@ -5,9 +5,14 @@ Supports RU/KZ/EN languages with comprehensive marker coverage.
 
 import re
 from typing import Dict, List, Optional, Tuple, Any
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, fields
 from enum import Enum
 
+import orjson
+
+from app.services.alias_matcher import AliasMatcher
+from app.services.cache import LRUCache, content_digest
+
 
 class MarkerCategory(str, Enum):
     HEMATOLOGY = "hematology"
@@ -23,7 +28,7 @@ class MarkerCategory(str, Enum):
     HORMONES = "hormones"
 
 
-@dataclass
+@dataclass(slots=True)
 class MarkerResult:
     value: Optional[float] = None
     unit: Optional[str] = None
@@ -34,6 +39,10 @@ class MarkerResult:
     raw_text: Optional[str] = None
 
 
+# MarkerResult is flat, so serialize it by field name instead of asdict's deep copy
+_MARKER_RESULT_FIELDS = tuple(f.name for f in fields(MarkerResult))
+
+
 @dataclass
 class BloodAnalysisExtraction:
     # === HEMATOLOGY (Complete Blood Count) ===
@@ -140,10 +149,18 @@ class BloodAnalysisExtraction:
     patient_name: Optional[str] = None
 
 
+_METADATA_FIELDS = frozenset({"lab_name", "analysis_date", "patient_name"})
+# Marker fields of BloodAnalysisExtraction, in declaration order
+_MARKER_FIELDS = tuple(
+    f.name for f in fields(BloodAnalysisExtraction) if f.name not in _METADATA_FIELDS
+)
+_MARKER_FIELD_SET = frozenset(_MARKER_FIELDS)
+
+
 # Comprehensive aliases for all markers (RU/KZ/EN)
 MARKER_ALIASES: Dict[str, List[str]] = {
     # Hematology
-    "hemoglobin": ["hemoglobin", "hgb", "hb", "гемоглобин", "гемоглобин"],
+    "hemoglobin": ["hemoglobin", "hgb", "hb", "гемоглобин"],
     "rbc": ["rbc", "erythrocytes", "red blood cells", "эритроциты", "эритроциттер", "эр."],
     "wbc": ["wbc", "leukocytes", "white blood cells", "лейкоциты", "лейкоциттер", "лейк."],
     "platelets": ["platelets", "plt", "thrombocytes", "тромбоциты", "тромбоциттер"],
@@ -265,73 +282,120 @@ REFERENCE_RANGES: Dict[str, Tuple[float, float, str]] = {
     "crp": (0, 5, "mg/L"),
 }
 
+# Critical thresholds: below 70% of the lower bound or above 150% of the upper
+CRITICAL_LOW_FACTOR = 0.7
+CRITICAL_HIGH_FACTOR = 1.5
+
+# marker -> (ref_min, ref_max, critical_low, critical_high, unit) for the defaults
+_DEFAULT_THRESHOLDS: Dict[str, Tuple[float, float, float, float, str]] = {
+    key: (lo, hi, lo * CRITICAL_LOW_FACTOR, hi * CRITICAL_HIGH_FACTOR, unit)
+    for key, (lo, hi, unit) in REFERENCE_RANGES.items()
+}
+
+
+_all_aliases = [alias for aliases in MARKER_ALIASES.values() for alias in aliases]
+assert all(alias == alias.lower() for alias in _all_aliases), "marker aliases must be lowercase"
+assert len(_all_aliases) == len(set(_all_aliases)), "each alias must map to exactly one marker, once"
+del _all_aliases
+
+
+# What follows an alias: optional text in parens, optional NA marker, then number with optional asterisk
+# Handles: "HbA1c (гликированный Hb) 5.6", "Хлор NA 105", "ЛПВП 1.08*"
+# The parenthetical is bounded so an unclosed "(" cannot make every alias
+# occurrence scan to the end of the text in the whole-text fallback
+_VALUE_SUFFIX_RE = re.compile(
+    r"(?:\s*\([^)]{0,100}\))?(?:\s*NA)?\s*[:\-]?\s*(?P<value>\d+(?:[.,]\d+)?)(?P<asterisk>\*)?(?:\s*(?P<unit>[a-zа-яёµ%\^\d\/\.\-]+))?",
+    flags=re.IGNORECASE
+)
+# The same suffix for text that is already lowercased: case-sensitive, so the
+# engine skips case folding ("μ" is listed because IGNORECASE equates it with "µ")
+_VALUE_SUFFIX_LOWER_RE = re.compile(
+    r"(?:\s*\([^)]{0,100}\))?(?:\s*na)?\s*[:\-]?\s*(?P<value>\d+(?:[.,]\d+)?)(?P<asterisk>\*)?(?:\s*(?P<unit>[a-zа-яёµμ%\^\d\/\.\-]+))?"
+)
+
+
+def _compile_alias_pattern(aliases: List[str]) -> re.Pattern:
+    # Create pattern that matches any alias followed by value
+    # Longest aliases first, so a prefix alias never wins the alternation and backtracks
+    alias_pattern = "|".join(re.escape(a) for a in sorted(set(aliases), key=len, reverse=True))
+    return re.compile(rf"(?P<alias>{alias_pattern}){_VALUE_SUFFIX_RE.pattern}", flags=re.IGNORECASE)
+
+
+class _LazyAliasPatterns(dict):
+    """marker -> alias pattern, compiled on first lookup; only needed when lowercasing shifts offsets."""
+
+    def __missing__(self, marker: str) -> re.Pattern:
+        pattern = self[marker] = _compile_alias_pattern(MARKER_ALIASES[marker])
+        return pattern
+
+
+_ALIAS_PATTERNS: Dict[str, re.Pattern] = _LazyAliasPatterns()
+
+# One automaton over every alias: a single scan locates every alias occurrence,
+# and the value after it is read with _VALUE_SUFFIX_RE
+_ALIAS_MATCHER = AliasMatcher(
+    (alias, marker) for marker, aliases in MARKER_ALIASES.items() for alias in aliases
+)
+# The same aliases, counted only at the start of a word; see mentioned_markers
+_WORD_ALIAS_MATCHER = AliasMatcher(
+    ((alias, marker) for marker, aliases in MARKER_ALIASES.items() for alias in aliases),
+    word_start=True,
+)
+# Candidates are tried in MARKER_ALIASES order, as the full loop did
+_MARKER_ORDER = {marker: idx for idx, marker in enumerate(MARKER_ALIASES)}
+
+# Combined ALT/AST pattern
+_ALT_AST_RE = re.compile(
+    r"(?:алт|alt)\s*/\s*(?:аст|ast)[^\d]*(?P<alt>\d+(?:[.,]\d+)?)\s*/\s*(?P<ast>\d+(?:[.,]\d+)?)",
+    flags=re.IGNORECASE
+)
+
+# Reference range patterns - multiple formats
+# Pattern 1: "норма: 3.9-6.1" or "ref: 3.9 - 6.1"
+_REF_LABELED_RE = re.compile(
+    r"(?:норма|ref|reference|референс|нормасы)[:\s]*(?P<min>\d+(?:[.,]\d+)?)\s*[-–—]\s*(?P<max>\d+(?:[.,]\d+)?)",
+    flags=re.IGNORECASE
+)
+
+# Pattern 2: Just a range at end of line "3.9 - 6.1" or "(3.9-6.1)"
+_REF_SIMPLE_RE = re.compile(
+    r"(?:\()?(?P<min>\d+(?:[.,]\d+)?)\s*[-–—]\s*(?P<max>\d+(?:[.,]\d+)?)(?:\))?(?:\s*(?:ммоль|мкмоль|г|мг|ед|u|g|mg|mmol)?(?:/л|/l)?)?$",
+    flags=re.IGNORECASE
+)
+
+# Pattern 3: "< 5.0" or "> 2.0" for single-bound references
+_REF_SINGLE_RE = re.compile(
+    r"(?P<op>[<>≤≥])\s*(?P<val>\d+(?:[.,]\d+)?)",
+    flags=re.IGNORECASE
+)
+
+_DIGIT_RE = re.compile(r"\d")
+
+# Lab names in priority order: the first one mentioned anywhere in the text wins
+LAB_NAMES = ("invivo", "олимп", "synlab", "kdl", "медицинская лаборатория")
+_LAB_PRIORITY = {name: idx for idx, name in enumerate(LAB_NAMES)}
+_LAB_RE = re.compile("|".join(re.escape(name) for name in LAB_NAMES), flags=re.IGNORECASE)
+
+# Date pattern
+_DATE_RE = re.compile(
+    r"(?:дата|date)[:\s]*(?P<date>\d{1,2}[./]\d{1,2}[./]\d{2,4})",
+    flags=re.IGNORECASE
+)
+
 
 class BloodNLPExtractor:
     """NLP-based blood analysis extractor with pattern matching."""
     
     def __init__(self):
-        self._compile_patterns()
-    
-    def _compile_patterns(self):
-        """Compile regex patterns for efficient matching."""
-        self.alias_patterns: Dict[str, re.Pattern] = {}
-        
-        for marker, aliases in MARKER_ALIASES.items():
-            # Create pattern that matches any alias followed by value
-            # Handles: "HbA1c (гликированный Hb) 5.6", "Хлор NA 105", "ЛПВП 1.08*"
-            alias_pattern = "|".join(re.escape(a) for a in aliases)
-            # Pattern: alias, optional text in parens, optional NA marker, then number with optional asterisk
-            pattern = re.compile(
-                rf"(?P<alias>{alias_pattern})(?:\s*\([^)]*\))?(?:\s*NA)?\s*[:\-]?\s*(?P<value>\d+(?:[.,]\d+)?)(?P<asterisk>\*)?(?:\s*(?P<unit>[a-zа-яёµ%\^\d\/\.\-]+))?",
-                flags=re.IGNORECASE
-            )
-            self.alias_patterns[marker] = pattern
-        
-        # Combined ALT/AST pattern
-        self.alt_ast_pattern = re.compile(
-            r"(?:алт|alt)\s*/\s*(?:аст|ast)[^\d]*(?P<alt>\d+(?:[.,]\d+)?)\s*/\s*(?P<ast>\d+(?:[.,]\d+)?)",
-            flags=re.IGNORECASE
-        )
-        
-        # Reference range patterns - multiple formats
-        # Pattern 1: "норма: 3.9-6.1" or "ref: 3.9 - 6.1"
-        self.ref_range_pattern_labeled = re.compile(
-            r"(?:норма|ref|reference|референс|нормасы)[:\s]*(?P<min>\d+(?:[.,]\d+)?)\s*[-–—]\s*(?P<max>\d+(?:[.,]\d+)?)",
-            flags=re.IGNORECASE
-        )
-        
-        # Pattern 2: Just a range at end of line "3.9 - 6.1" or "(3.9-6.1)"
-        self.ref_range_pattern_simple = re.compile(
-            r"(?:\()?(?P<min>\d+(?:[.,]\d+)?)\s*[-–—]\s*(?P<max>\d+(?:[.,]\d+)?)(?:\))?(?:\s*(?:ммоль|мкмоль|г|мг|ед|u|g|mg|mmol)?(?:/л|/l)?)?$",
-            flags=re.IGNORECASE
-        )
-        
-        # Pattern 3: "< 5.0" or "> 2.0" for single-bound references  
-        self.ref_range_pattern_single = re.compile(
-            r"(?P<op>[<>≤≥])\s*(?P<val>\d+(?:[.,]\d+)?)",
-            flags=re.IGNORECASE
-        )
-        
-        # Combined pattern for inline search
-        self.ref_range_pattern = re.compile(
-            r"(?:(?:норма|ref|reference|референс|нормасы)[:\s]*)?(?P<min>\d+(?:[.,]\d+)?)\s*[-–—]\s*(?P<max>\d+(?:[.,]\d+)?)",
-            flags=re.IGNORECASE
-        )
-        
-        # Lab name patterns
-        self.lab_patterns = [
-            re.compile(r"invivo", flags=re.IGNORECASE),
-            re.compile(r"олимп", flags=re.IGNORECASE),
-            re.compile(r"synlab", flags=re.IGNORECASE),
-            re.compile(r"kdl", flags=re.IGNORECASE),
-            re.compile(r"медицинская лаборатория", flags=re.IGNORECASE),
-        ]
-        
-        # Date pattern
-        self.date_pattern = re.compile(
-            r"(?:дата|date)[:\s]*(?P<date>\d{1,2}[./]\d{1,2}[./]\d{2,4})",
-            flags=re.IGNORECASE
-        )
+        # Patterns are compiled once at import and shared by every instance
+        self.alias_patterns = _ALIAS_PATTERNS
+        self.alias_matcher = _ALIAS_MATCHER
+        self._marker_order = _MARKER_ORDER
+        self.alt_ast_pattern = _ALT_AST_RE
+        self.ref_range_pattern_labeled = _REF_LABELED_RE
+        self.ref_range_pattern_simple = _REF_SIMPLE_RE
+        self.ref_range_pattern_single = _REF_SINGLE_RE
+        self.date_pattern = _DATE_RE
     
     def extract(self, text: str) -> BloodAnalysisExtraction:
         """
@@ -346,13 +410,11 @@ class BloodNLPExtractor:
         if not text:
             return BloodAnalysisExtraction()
         
-        result = BloodAnalysisExtraction()
+        # Markers are collected in a plain dict and turned into the dataclass once
+        found: Dict[str, MarkerResult] = {}
         text_lower = text.lower()
-        lines = [line.strip() for line in text.splitlines() if line.strip()]
-        
-        # Extract metadata
-        result.lab_name = self._extract_lab_name(text)
-        result.analysis_date = self._extract_date(text)
+        # Every marker pattern needs a numeric value, so prose lines are dropped here
+        lines = [line for line in map(str.strip, text.splitlines()) if _DIGIT_RE.search(line)]
         
         # Handle combined ALT/AST pattern first
         for match in self.alt_ast_pattern.finditer(text):
@@ -360,38 +422,44 @@ class BloodNLPExtractor:
             ast_value = self._parse_float(match.group("ast"))
             
             if alt_value is not None:
-                result.alt = MarkerResult(
+                found["alt"] = MarkerResult(
                     value=alt_value,
                     unit="U/L",
                     confidence=1.0,
                     raw_text=match.group(0)
                 )
-                self._add_reference_and_status(result.alt, "alt")
+                self._add_reference_and_status(found["alt"], "alt")
             
             if ast_value is not None:
-                result.ast = MarkerResult(
+                found["ast"] = MarkerResult(
                     value=ast_value,
                     unit="U/L",
                     confidence=1.0,
                     raw_text=match.group(0)
                 )
-                self._add_reference_and_status(result.ast, "ast")
+                self._add_reference_and_status(found["ast"], "ast")
+        
+        # Alias offsets found in lowercased text are valid in the original
+        # unless lowercasing changed the length (e.g. "İ"); then use the regexes
+        aligned = len(text_lower) == len(text)
         
         # Line-by-line extraction (higher confidence)
         for line in lines:
             line_lower = line.lower()
+            occurrences = self._alias_occurrences(line_lower)
             
-            for marker, pattern in self.alias_patterns.items():
+            for marker in sorted(occurrences, key=self._marker_order.__getitem__):
                 # Skip if already found with high confidence
-                existing = getattr(result, marker, None)
+                existing = found.get(marker)
                 if existing and existing.confidence >= 1.0:
                     continue
                 
-                match = pattern.search(line)
-                if match:
+                hit = self._search_marker(marker, line, line_lower, occurrences[marker] if aligned else None)
+                if hit:
+                    _, match = hit
                     value = self._parse_float(match.group("value"))
-                    unit = match.group("unit") if "unit" in match.groupdict() and match.group("unit") else None
-                    has_asterisk = match.group("asterisk") if "asterisk" in match.groupdict() else None
+                    unit = match.group("unit") or None
+                    has_asterisk = match.group("asterisk")
                     
                     if value is not None:
                         marker_result = MarkerResult(
@@ -406,64 +474,25 @@ class BloodNLPExtractor:
                             marker_result.status = "warning"  # Will be recalculated if ref range found
                         
                         # FIRST: Extract reference range from same line (after the value)
-                        value_end_pos = match.end()
-                        line_after_value = line[value_end_pos:]
-                        
-                        # Try labeled pattern first (норма: X-Y)
-                        ref_match = self.ref_range_pattern_labeled.search(line_after_value)
-                        if ref_match:
-                            marker_result.reference_min = self._parse_float(ref_match.group("min"))
-                            marker_result.reference_max = self._parse_float(ref_match.group("max"))
-                        else:
-                            # Try simple range pattern (X - Y at end)
-                            ref_match = self.ref_range_pattern_simple.search(line_after_value)
-                            if ref_match:
-                                ref_min = self._parse_float(ref_match.group("min"))
-                                ref_max = self._parse_float(ref_match.group("max"))
-                                # Sanity check: reference range should be plausible
-                                if ref_min is not None and ref_max is not None and ref_min < ref_max:
-                                    marker_result.reference_min = ref_min
-                                    marker_result.reference_max = ref_max
-                            else:
-                                # Try single bound (< X or > X) - also look for "уровень >X" pattern
-                                single_match = self.ref_range_pattern_single.search(line_after_value)
-                                if single_match:
-                                    op = single_match.group("op")
-                                    val = self._parse_float(single_match.group("val"))
-                                    if val is not None:
-                                        if op in "<≤":
-                                            marker_result.reference_min = 0
-                                            marker_result.reference_max = val
-                                        elif op in ">≥":
-                                            marker_result.reference_min = val
-                                            marker_result.reference_max = val * 10  # Rough upper bound
-                                else:
-                                    # Try "уровень >X" or "уровень <X" pattern in comments
-                                    comment_ref = re.search(r"уровень\s*([<>≤≥])\s*(\d+(?:[.,]\d+)?)", line_after_value, re.IGNORECASE)
-                                    if comment_ref:
-                                        op = comment_ref.group(1)
-                                        val = self._parse_float(comment_ref.group(2))
-                                        if val is not None:
-                                            if op in "<≤":
-                                                marker_result.reference_min = 0
-                                                marker_result.reference_max = val
-                                            elif op in ">≥":
-                                                marker_result.reference_min = val
-                                                marker_result.reference_max = val * 10
+                        reference = self._reference_range(line, match.end())
+                        if reference:
+                            marker_result.reference_min, marker_result.reference_max = reference
                         
                         # THEN: Add defaults if not found in PDF, and calculate status
                         self._add_reference_and_status(marker_result, marker)
                         
-                        setattr(result, marker, marker_result)
+                        found[marker] = marker_result
         
         # Fallback: search entire text (lower confidence)
-        for marker, pattern in self.alias_patterns.items():
-            existing = getattr(result, marker, None)
+        occurrences = self._alias_occurrences(text_lower)
+        for marker in sorted(occurrences, key=self._marker_order.__getitem__):
+            existing = found.get(marker)
             if existing and existing.confidence > 0:
                 continue
             
-            match = pattern.search(text)
-            if match:
+            hit = self._search_marker(marker, text, text_lower, occurrences[marker] if aligned else None)
+            if hit:
+                start, match = hit
                 value = self._parse_float(match.group("value"))
                 unit = match.group("unit") if match.lastgroup == "unit" else None
                 
@@ -472,12 +501,75 @@ class BloodNLPExtractor:
                         value=value,
                         unit=self._normalize_unit(unit),
                         confidence=0.7,
-                        raw_text=match.group(0)
+                        raw_text=text[start:match.end()]
                     )
                     self._add_reference_and_status(marker_result, marker)
-                    setattr(result, marker, marker_result)
+                    found[marker] = marker_result
         
-        return result
+        return BloodAnalysisExtraction(
+            **found,
+            lab_name=self._extract_lab_name(text),
+            analysis_date=self._extract_date(text),
+        )
+    
+    def _alias_occurrences(self, text_lower: str) -> Dict[str, List[Tuple[int, int]]]:
+        """marker -> (start, end) of its aliases in text_lower, leftmost first, longer alias first."""
+        occurrences: Dict[str, List[Tuple[int, int]]] = {}
+        for start, end, marker in sorted(self.alias_matcher.find_all(text_lower), key=lambda o: (o[0], o[0] - o[1])):
+            occurrences.setdefault(marker, []).append((start, end))
+        return occurrences
+    
+    def _search_marker(
+        self, marker: str, text: str, text_lower: str, occurrences: Optional[List[Tuple[int, int]]]
+    ) -> Optional[Tuple[int, re.Match]]:
+        """
+        Find the first alias of marker followed by a value, as alias_patterns[marker].search would.
+        
+        Returns (alias start, match of the value suffix). The suffix is matched
+        on text_lower, so its unit group is lowercase (units are lowercased when
+        normalized anyway). Without occurrences (offsets unusable) the marker's
+        own pattern is searched in text instead.
+        """
+        if occurrences is None:
+            match = self.alias_patterns[marker].search(text)
+            return (match.start(), match) if match else None
+        for start, end in occurrences:
+            match = _VALUE_SUFFIX_LOWER_RE.match(text_lower, end)
+            if match:
+                return start, match
+        return None
+    
+    def _reference_range(self, text: str, pos: int = 0) -> Optional[Tuple[float, float]]:
+        """Reference range stated in text from pos on: labeled, trailing "X - Y", or a single bound."""
+        # Searching from pos instead of slicing; none of the patterns use ^ or lookbehind
+        # Every supported form contains a number
+        if not _DIGIT_RE.search(text, pos):
+            return None
+        
+        # Try labeled pattern first (норма: X-Y)
+        ref_match = self.ref_range_pattern_labeled.search(text, pos)
+        if ref_match:
+            return self._parse_float(ref_match.group("min")), self._parse_float(ref_match.group("max"))
+        
+        # Try simple range pattern (X - Y at end)
+        ref_match = self.ref_range_pattern_simple.search(text, pos)
+        if ref_match:
+            ref_min = self._parse_float(ref_match.group("min"))
+            ref_max = self._parse_float(ref_match.group("max"))
+            # Sanity check: reference range should be plausible
+            if ref_min is not None and ref_max is not None and ref_min < ref_max:
+                return ref_min, ref_max
+            return None
+        
+        # Try single bound (< X or > X); also covers "уровень >X" in comments
+        single_match = self.ref_range_pattern_single.search(text, pos)
+        if single_match:
+            val = self._parse_float(single_match.group("val"))
+            if val is not None:
+                if single_match.group("op") in "<≤":
+                    return 0, val
+                return val, val * 10  # Rough upper bound
+        return None
     
     def _parse_float(self, value_str: Optional[str]) -> Optional[float]:
         """Parse float from string, handling comma as decimal separator."""
@@ -510,46 +602,63 @@ class BloodNLPExtractor:
         
         return normalizations.get(unit, unit)
     
-    def _add_reference_and_status(self, marker_result: MarkerResult, marker_key: str):
+    @staticmethod
+    def _add_reference_and_status(marker_result: MarkerResult, marker_key: str):
         """Add reference range (from PDF first, fallback to defaults) and calculate status."""
         # Remember if asterisk was present (indicates abnormal)
         had_asterisk_warning = marker_result.status == "warning"
+        ref_min = marker_result.reference_min
+        ref_max = marker_result.reference_max
+        critical_low = critical_high = None
         
         # Only use defaults if PDF didn't provide reference ranges
-        if marker_key in REFERENCE_RANGES:
-            ref_min, ref_max, default_unit = REFERENCE_RANGES[marker_key]
+        defaults = _DEFAULT_THRESHOLDS.get(marker_key)
+        if defaults is not None:
+            default_min, default_max, default_critical_low, default_critical_high, default_unit = defaults
             
             # Use PDF-extracted refs if available, otherwise use defaults
-            if marker_result.reference_min is None:
-                marker_result.reference_min = ref_min
-            if marker_result.reference_max is None:
-                marker_result.reference_max = ref_max
+            if ref_min is None:
+                ref_min = marker_result.reference_min = default_min
+                critical_low = default_critical_low
+            if ref_max is None:
+                ref_max = marker_result.reference_max = default_max
+                critical_high = default_critical_high
             if marker_result.unit is None:
                 marker_result.unit = default_unit
         
         # Calculate status based on reference range
-        if marker_result.value is not None and marker_result.reference_min is not None and marker_result.reference_max is not None:
-            if marker_result.value < marker_result.reference_min * 0.7:
+        value = marker_result.value
+        if value is not None and ref_min is not None and ref_max is not None:
+            if critical_low is None:
+                critical_low = ref_min * CRITICAL_LOW_FACTOR
+            if critical_high is None:
+                critical_high = ref_max * CRITICAL_HIGH_FACTOR
+            
+            if value < critical_low:
                 marker_result.status = "critical_low"
-            elif marker_result.value < marker_result.reference_min:
+            elif value < ref_min:
                 marker_result.status = "low"
-            elif marker_result.value > marker_result.reference_max * 1.5:
+            elif value > critical_high:
                 marker_result.status = "critical_high"
-            elif marker_result.value > marker_result.reference_max:
+            elif value > ref_max:
                 marker_result.status = "high"
             else:
                 # If asterisk was present but value seems normal, still mark as warning
                 marker_result.status = "warning" if had_asterisk_warning else "normal"
-        elif marker_result.value is not None:
+        elif value is not None:
             # No reference range - if asterisk present, it's warning, otherwise unknown
             marker_result.status = "warning" if had_asterisk_warning else "unknown"
     
     def _extract_lab_name(self, text: str) -> Optional[str]:
         """Extract laboratory name from text."""
-        for pattern in self.lab_patterns:
-            if pattern.search(text):
-                return pattern.pattern
-        return None
+        best: Optional[int] = None
+        for match in _LAB_RE.finditer(text):
+            priority = _LAB_PRIORITY.get(match.group(0).lower())
+            if priority is not None and (best is None or priority < best):
+                best = priority
+                if best == 0:
+                    break
+        return LAB_NAMES[best] if best is not None else None
     
     def _extract_date(self, text: str) -> Optional[str]:
         """Extract analysis date from text."""
@@ -566,7 +675,7 @@ class BloodNLPExtractor:
             value = getattr(extraction, field_name)
             if value is not None:
                 if isinstance(value, MarkerResult):
-                    result[field_name] = asdict(value)
+                    result[field_name] = {name: getattr(value, name) for name in _MARKER_RESULT_FIELDS}
                 else:
                     result[field_name] = value
         
@@ -574,44 +683,41 @@ class BloodNLPExtractor:
     
     def get_summary(self, extraction: BloodAnalysisExtraction) -> Dict[str, Any]:
         """Get summary of extraction with counts and alerts."""
-        total = 0
+        total = len(_MARKER_FIELDS)
         found = 0
         alerts = []
+        critical_count = 0
+        warning_count = 0
         
-        for field_name in extraction.__dataclass_fields__:
-            if field_name in ["lab_name", "analysis_date", "patient_name"]:
-                continue
-            
-            total += 1
+        for field_name in _MARKER_FIELDS:
             value = getattr(extraction, field_name)
             
             if value is not None and isinstance(value, MarkerResult) and value.value is not None:
                 found += 1
                 
-                if value.status in ["critical_low", "critical_high"]:
-                    alerts.append({
-                        "marker": field_name,
-                        "value": value.value,
-                        "unit": value.unit,
-                        "status": value.status,
-                        "severity": "critical"
-                    })
-                elif value.status in ["low", "high"]:
-                    alerts.append({
-                        "marker": field_name,
-                        "value": value.value,
-                        "unit": value.unit,
-                        "status": value.status,
-                        "severity": "warning"
-                    })
+                if value.status in ("critical_low", "critical_high"):
+                    severity = "critical"
+                    critical_count += 1
+                elif value.status in ("low", "high"):
+                    severity = "warning"
+                    warning_count += 1
+                else:
+                    continue
+                alerts.append({
+                    "marker": field_name,
+                    "value": value.value,
+                    "unit": value.unit,
+                    "status": value.status,
+                    "severity": severity,
+                })
         
         return {
             "total_markers": total,
             "found_markers": found,
             "extraction_rate": round(found / total * 100, 1) if total > 0 else 0,
             "alerts": alerts,
-            "critical_count": len([a for a in alerts if a["severity"] == "critical"]),
-            "warning_count": len([a for a in alerts if a["severity"] == "warning"]),
+            "critical_count": critical_count,
+            "warning_count": warning_count,
         }
 
 
@@ -619,6 +725,10 @@ class BloodNLPExtractor:
 extractor = BloodNLPExtractor()
 
 
+# Results by text digest; entries are serialized so callers may mutate what they get back
+_result_cache: LRUCache[bytes] = LRUCache(maxsize=256)
+
+
 def extract_blood_analysis(text: str) -> Dict[str, Any]:
     """
     Main entry point for blood analysis extraction.
@@ -629,8 +739,60 @@ def extract_blood_analysis(text: str) -> Dict[str, Any]:
     Returns:
         Dictionary with extracted markers and summary
     """
-    extraction = extractor.extract(text)
+    cache_key = content_digest(text)
+    cached = _result_cache.get(cache_key)
+    if cached is not None:
+        return orjson.loads(cached)
+    
+    result = _extraction_to_result(extractor.extract(text))
+    _result_cache.set(cache_key, orjson.dumps(result))
+    return result
+
+
+def build_blood_analysis(markers: Dict[str, Dict[str, Any]], text: str = "") -> Dict[str, Any]:
+    """
+    Shape already-parsed markers (e.g. from PDF tables) like extract_blood_analysis,
+    without running the NLP pass over the text.
+    
+    Units are normalized and missing reference ranges and statuses are
+    filled from the defaults, as extract() does for markers found in text.
     
+    Args:
+        markers: marker key -> MarkerResult fields
+        text: Normalized text, used only for lab name and date
+    """
+    extraction = BloodAnalysisExtraction()
+    for key, marker in markers.items():
+        if key in _MARKER_FIELD_SET:
+            marker_result = MarkerResult(**marker)
+            marker_result.unit = extractor._normalize_unit(marker_result.unit)
+            extractor._add_reference_and_status(marker_result, key)
+            setattr(extraction, key, marker_result)
+    if text:
+        extraction.lab_name = extractor._extract_lab_name(text)
+        extraction.analysis_date = extractor._extract_date(text)
+    return _extraction_to_result(extraction)
+
+
+def mentioned_markers(text: str) -> set[str]:
+    """
+    Keys of markers named in text with a value after the name.
+    
+    A cheap check for markers a report states beyond a known set. The alias
+    must begin a word, so short aliases inside other words, URLs or header
+    fields ("k" in "invivo.kz", "аст" in "Возраст: 45") do not count.
+    """
+    text_lower = text.lower()
+    found = {
+        key for _, end, key in _WORD_ALIAS_MATCHER.find_all(text_lower)
+        if _VALUE_SUFFIX_LOWER_RE.match(text_lower, end)
+    }
+    if _ALT_AST_RE.search(text):
+        found.update(("alt", "ast"))
+    return found
+
+
+def _extraction_to_result(extraction: BloodAnalysisExtraction) -> Dict[str, Any]:
     return {
         "markers": extractor.to_dict(extraction),
         "summary": extractor.get_summary(extraction),
@@ -0,0 +1,57 @@
+"""
+Small in-process caches shared by the services.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import BinaryIO, Generic, Hashable, Optional, TypeVar
+
+V = TypeVar("V")
+
+
+def content_digest(*parts: bytes | str) -> str:
+    """Stable hex digest of the given parts (BLAKE2b, fast on large audio blobs)."""
+    h = hashlib.blake2b(digest_size=20)
+    for part in parts:
+        h.update(part.encode("utf-8") if isinstance(part, str) else part)
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def file_digest(fileobj: BinaryIO) -> str:
+    """Digest of a binary file's remaining contents, read in chunks."""
+    return hashlib.file_digest(fileobj, lambda: hashlib.blake2b(digest_size=20)).hexdigest()
+
+
+class LRUCache(Generic[V]):
+    """Bounded mapping that evicts the least recently used entry; safe to share across threads."""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, V]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[V]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: V) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
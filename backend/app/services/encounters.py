@@ -1,14 +1,14 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
-from typing import Any, Iterable
+from typing import Any, Iterable, Sequence
 from uuid import uuid4
 
 from fastapi import HTTPException, status
 from sqlalchemy import desc, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import Encounter
+from app.models import Encounter, EncounterMessage
 from app.schemas.encounter import EncounterStatus
 
 DEFAULT_STATE: dict[str, Any] = {
@@ -27,7 +27,12 @@ def _merge_state(
     current: dict[str, Any] | None,
     update: dict[str, Any] | None,
 ) -> dict[str, Any]:
-    state = {**DEFAULT_STATE, **(current or {})}
+    if current and DEFAULT_STATE.keys() <= current.keys():
+        # Stored states already carry every default key
+        state = current.copy()
+    else:
+        # Fresh containers so a new state never shares DEFAULT_STATE's
+        state = {**DEFAULT_STATE, "messages": [], "context": {}, **(current or {})}
     if update:
         # Merge shallow keys; keep existing messages unless explicitly provided
         for key, value in update.items():
@@ -38,6 +43,23 @@ def _merge_state(
     return state
 
 
+def encounter_state(encounter: Encounter) -> dict[str, Any] | None:
+    """
+    Return the encounter state as exposed by the API.
+
+    Messages given in state_json (initial state or a pause update) come
+    first, followed by the turns stored in encounter_messages.
+    """
+    if encounter.state_json is None and not encounter.messages:
+        return None
+    state = {**DEFAULT_STATE, **(encounter.state_json or {})}
+    state["messages"] = list(state.get("messages") or []) + [
+        {"role": message.role, "content": message.content, "timestamp": message.timestamp}
+        for message in encounter.messages
+    ]
+    return state
+
+
 async def create_encounter(
     session: AsyncSession,
     *,
@@ -103,6 +125,9 @@ async def pause_encounter(
     encounter.paused_at = _utcnow()
     encounter.last_activity_at = encounter.paused_at
     encounter.state_json = _merge_state(encounter.state_json, state_update)
+    if state_update and isinstance(state_update.get("messages"), list):
+        # An explicit message list replaces the whole history
+        encounter.messages.clear()
 
     await session.commit()
     await session.refresh(encounter)
@@ -164,24 +189,20 @@ async def append_message(
             detail="Cannot add messages unless encounter is active",
         )
 
-    state = _merge_state(encounter.state_json, None)
-    messages: list[dict[str, Any]] = list(state.get("messages", []))
-    messages.append(
-        {
-            "role": role,
-            "content": content,
-            "timestamp": _utcnow().isoformat(),
-        }
+    # The turn is a single INSERT; state_json is only rewritten when the
+    # step or context changes
+    now = _utcnow()
+    encounter.messages.append(
+        EncounterMessage(role=role, content=content, timestamp=now.isoformat())
     )
-    state["messages"] = messages
-    if flow_step is not None:
-        state["flow_step"] = flow_step
-    if context:
-        merged_context = {**state.get("context", {}), **context}
-        state["context"] = merged_context
-
-    encounter.state_json = state
-    encounter.last_activity_at = _utcnow()
+    if flow_step is not None or context:
+        state = _merge_state(encounter.state_json, None)
+        if flow_step is not None:
+            state["flow_step"] = flow_step
+        if context:
+            state["context"] = {**state.get("context", {}), **context}
+        encounter.state_json = state
+    encounter.last_activity_at = now
 
     await session.commit()
     await session.refresh(encounter)
@@ -202,14 +223,13 @@ async def list_encounters(
     *,
     user_id: str,
     statuses: Iterable[str] | None = None,
-) -> list[Encounter]:
+) -> Sequence[Encounter]:
     stmt = select(Encounter).where(Encounter.user_id == user_id)
     if statuses:
         stmt = stmt.where(Encounter.status.in_(list(statuses)))
     stmt = stmt.order_by(desc(Encounter.last_activity_at), desc(Encounter.created_at))
 
-    result = await session.execute(stmt)
-    return list(result.scalars().all())
+    return (await session.scalars(stmt)).all()
 
 
 async def latest_active_or_paused(
@@ -231,5 +251,4 @@ async def latest_active_or_paused(
         .order_by(desc(Encounter.last_activity_at), desc(Encounter.created_at))
         .limit(1)
     )
-    result = await session.execute(stmt)
-    return result.scalars().first()
+    return await session.scalar(stmt)
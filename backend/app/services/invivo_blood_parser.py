@@ -5,6 +5,8 @@ Parser for Invivo (RU/KZ) blood analysis PDFs.
 from typing import Dict, List, Optional, Tuple
 import re
 
+from app.services.alias_matcher import AliasMatcher
+
 ResultEntry = Dict[str, float | str | None]
 ParsedResult = Dict[str, ResultEntry]
 
@@ -22,6 +24,38 @@ ALIASES: Dict[str, List[str]] = {
 }
 
 
+_NUMBER_RE = re.compile(r"(\d+(?:[.,]\d+)?)")
+_VALUE_UNIT_RE = re.compile(
+    r"\d+(?:[.,]\d+)?\s*([a-zа-яёµ/%\^\d\*\/\.]+)",
+    flags=re.IGNORECASE,
+)
+# First number and, when one directly follows it, its unit in one search
+_VALUE_WITH_UNIT_RE = re.compile(
+    r"(\d+(?:[.,]\d+)?)\s*([a-zа-яёµ/%\^\d\*\/\.]+)?",
+    flags=re.IGNORECASE,
+)
+
+# ALT/AST combined pattern (e.g., "АЛТ/АСТ 23/18")
+_ALT_AST_RE = re.compile(
+    r"(?:алт|alt)\s*/\s*(?:аст|ast)[^\d]*(?P<alt>\d+(?:[.,]\d+)?)\s*/\s*(?P<ast>\d+(?:[.,]\d+)?)(?:\s*(?P<unit>[a-zа-яё/%\^\d\*\/\.]+))?",
+    flags=re.IGNORECASE,
+)
+
+# All aliases in one automaton, so overlapping aliases of different markers
+# are all found in a single scan of a line
+_ALIAS_MATCHER = AliasMatcher(
+    (alias.lower(), key) for key, aliases in ALIASES.items() for alias in aliases
+)
+
+_FALLBACK_PATTERNS: Dict[str, re.Pattern] = {
+    key: re.compile(
+        rf"(?:{'|'.join(re.escape(a.lower()) for a in aliases)})[^\d]*(\d+(?:[.,]\d+)?)(?:\s*([a-zа-яё/%\^\d\*\/\.]+))?",
+        flags=re.IGNORECASE,
+    )
+    for key, aliases in ALIASES.items()
+}
+
+
 def _empty_result() -> ParsedResult:
     return {
         key: {"value": None, "unit": None, "confidence": 0.0}
@@ -30,7 +64,7 @@ def _empty_result() -> ParsedResult:
 
 
 def _parse_value_and_unit(line: str) -> Tuple[Optional[float], Optional[str]]:
-    value_match = re.search(r"(\d+(?:[.,]\d+)?)", line)
+    value_match = _VALUE_WITH_UNIT_RE.search(line)
     if not value_match:
         return None, None
 
@@ -40,13 +74,13 @@ def _parse_value_and_unit(line: str) -> Tuple[Optional[float], Optional[str]]:
     except ValueError:
         value = None
 
-    unit_match = re.search(
-        r"\d+(?:[.,]\d+)?\s*([a-zа-яёµ/%\^\d\*\/\.]+)",
-        line,
-        flags=re.IGNORECASE,
-    )
-    unit = unit_match.group(1).strip() if unit_match and unit_match.group(1) else None
-    return value, unit
+    unit = value_match.group(2)
+    if unit is None:
+        # _VALUE_UNIT_RE can still match by backtracking into the number or
+        # at a later one; nothing before the first digit can match
+        unit_match = _VALUE_UNIT_RE.search(line, value_match.start())
+        unit = unit_match.group(1) if unit_match else None
+    return value, unit.strip() if unit else None
 
 
 def _set_result(result: ParsedResult, key: str, value: Optional[float], unit: Optional[str], confidence: float) -> None:
@@ -61,15 +95,18 @@ def parse_invivo_blood(text: str) -> ParsedResult:
     """
     Parse Invivo blood analysis text (RU/KZ) into structured markers.
     """
+    return parse_invivo_blood_with_missing(text)[0]
+
+
+def parse_invivo_blood_with_missing(text: str) -> Tuple[ParsedResult, List[str]]:
+    """
+    Parse like parse_invivo_blood and also return the keys of markers that
+    were not found, collected during the final pass over the markers.
+    """
     normalized_text = text or ""
     result = _empty_result()
 
-    # ALT/AST combined pattern (e.g., "АЛТ/АСТ 23/18")
-    alt_ast_pattern = re.compile(
-        r"(?:алт|alt)\s*/\s*(?:аст|ast)[^\d]*(?P<alt>\d+(?:[.,]\d+)?)\s*/\s*(?P<ast>\d+(?:[.,]\d+)?)(?:\s*(?P<unit>[a-zа-яё/%\^\d\*\/\.]+))?",
-        flags=re.IGNORECASE,
-    )
-    for match in alt_ast_pattern.finditer(normalized_text):
+    for match in _ALT_AST_RE.finditer(normalized_text):
         unit = match.group("unit") or None
         alt_value = float(match.group("alt").replace(",", "."))
         ast_value = float(match.group("ast").replace(",", "."))
@@ -77,30 +114,39 @@ def parse_invivo_blood(text: str) -> ParsedResult:
         _set_result(result, "ast", ast_value, unit, 1.0)
 
     lines = [line.strip() for line in normalized_text.splitlines() if line.strip()]
-    alias_lower = {k: [alias.lower() for alias in v] for k, v in ALIASES.items()}
 
-    # Line-based parsing (higher confidence)
+    # Line-based parsing (higher confidence): find the markers named on the
+    # line first, then parse its value once for all of them. The first line
+    # naming a marker wins, so markers already claimed are skipped and the
+    # scan stops once every marker has been claimed
+    unclaimed = {key for key, entry in result.items() if entry["confidence"] < 1.0}
     for line in lines:
-        line_lower = line.lower()
-        for key, aliases in alias_lower.items():
-            if any(alias in line_lower for alias in aliases):
-                value, unit = _parse_value_and_unit(line)
-                _set_result(result, key, value, unit, 1.0)
+        if not unclaimed:
+            break
+        # A line without a number has no value to record
+        if not _NUMBER_RE.search(line):
+            continue
+        keys = _ALIAS_MATCHER.keys_in(line.lower()) & unclaimed
+        if not keys:
+            continue
+        value, unit = _parse_value_and_unit(line)
+        if value is None:
+            continue
+        for key in keys:
+            _set_result(result, key, value, unit, 1.0)
+        unclaimed -= keys
 
     # Fallback search across whole text (lower confidence)
-    for key, aliases in alias_lower.items():
+    missing: List[str] = []
+    for key, pattern in _FALLBACK_PATTERNS.items():
         if result[key]["confidence"] > 0:
             continue
-        alias_regex = "|".join(re.escape(a) for a in aliases)
-        pattern = re.compile(
-            rf"(?:{alias_regex})[^\d]*(\d+(?:[.,]\d+)?)(?:\s*([a-zа-яё/%\^\d\*\/\.]+))?",
-            flags=re.IGNORECASE,
-        )
         match = pattern.search(normalized_text)
         if not match:
+            missing.append(key)
             continue
         value = float(match.group(1).replace(",", "."))
         unit = match.group(2).strip() if match.group(2) else None
         _set_result(result, key, value, unit, 0.7)
 
-    return result
+    return result, missing
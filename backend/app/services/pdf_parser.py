@@ -3,8 +3,9 @@ PDF text extraction and normalization utilities.
 """
 
 from io import BytesIO
+import logging
 import re
-from typing import List, Dict, Any, Optional
+from typing import BinaryIO, List, Dict, Any, Optional, Union
 
 import pdfplumber
 
@@ -13,22 +14,42 @@ try:
 except ImportError:  # pragma: no cover - fallback may be unavailable in tests
     fitz = None  # type: ignore
 
+logger = logging.getLogger(__name__)
 
-def extract_tables_from_pdf(file_bytes: bytes) -> List[List[List[str]]]:
+# Raw PDF bytes or a seekable binary file such as UploadFile.file (a spooled
+# temp file); a file is parsed in place without copying it into memory
+PdfSource = Union[bytes, BinaryIO]
+
+
+def _open_stream(source: PdfSource) -> BinaryIO:
+    if isinstance(source, (bytes, bytearray)):
+        return BytesIO(source)
+    source.seek(0)
+    return source  # type: ignore[return-value]
+
+
+def _read_bytes(source: PdfSource) -> bytes:
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    source.seek(0)
+    return source.read()
+
+
+def extract_tables_from_pdf(file_bytes: PdfSource) -> List[List[List[str]]]:
     """
     Extract tables from PDF for structured data parsing.
     Returns list of tables, where each table is a list of rows.
     """
     tables = []
     try:
-        with pdfplumber.open(BytesIO(file_bytes)) as pdf:
+        with pdfplumber.open(_open_stream(file_bytes)) as pdf:
             total_pages = len(pdf.pages)
-            print(f"[DEBUG] PDF has {total_pages} pages")
+            logger.debug("PDF has %d pages", total_pages)
             
             for page_num, page in enumerate(pdf.pages, 1):
-                print(f"[DEBUG] Processing page {page_num}/{total_pages}")
+                logger.debug("Processing page %d/%d", page_num, total_pages)
                 page_tables = page.extract_tables() or []
-                print(f"[DEBUG] Page {page_num}: found {len(page_tables)} tables")
+                logger.debug("Page %d: found %d tables", page_num, len(page_tables))
                 
                 for table_idx, table in enumerate(page_tables):
                     if table:
@@ -41,13 +62,13 @@ def extract_tables_from_pdf(file_bytes: bytes) -> List[List[List[str]]]:
                                     cleaned_table.append(cleaned_row)
                         if cleaned_table:
                             tables.append(cleaned_table)
-                            print(f"[DEBUG] Page {page_num}, Table {table_idx+1}: {len(cleaned_table)} rows")
+                            logger.debug("Page %d, Table %d: %d rows", page_num, table_idx + 1, len(cleaned_table))
+                # Drop the page's parsed objects so memory stays bounded by one page
+                page.close()
     except Exception as e:
-        print(f"[DEBUG] Table extraction error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Table extraction error: %s", e)
     
-    print(f"[DEBUG] Total tables extracted: {len(tables)}")
+    logger.debug("Total tables extracted: %d", len(tables))
     return tables
 
 
@@ -71,6 +92,12 @@ def extract_lab_data_from_tables(tables: List[List[List[str]]]) -> List[Dict[str
     return results
 
 
+_LAB_NUM_RE = re.compile(r'^(\d+(?:[.,]\d+)?)\s*([a-zа-яёµ%\^\d\*\/\.\-]*)?$', re.IGNORECASE)
+_LAB_RANGE_RE = re.compile(r'(\d+(?:[.,]\d+)?)\s*[-–—]\s*(\d+(?:[.,]\d+)?)')
+_LAB_SINGLE_RE = re.compile(r'[<>≤≥]\s*(\d+(?:[.,]\d+)?)')
+_LAB_DIGIT_RE = re.compile(r'\d')
+
+
 def parse_lab_row(row: List[str]) -> Optional[Dict[str, Any]]:
     """
     Parse a single row from lab table.
@@ -93,9 +120,16 @@ def parse_lab_row(row: List[str]) -> Optional[Dict[str, Any]]:
         cell = cell.strip()
         if not cell:
             continue
-        
+
+        # Values and references all contain a digit; anything else can
+        # only be the marker name
+        if not _LAB_DIGIT_RE.search(cell):
+            if marker_name is None and len(cell) > 1:
+                marker_name = cell
+            continue
+
         # Try to extract numeric value
-        num_match = re.search(r'^(\d+(?:[.,]\d+)?)\s*([a-zа-яёµ%\^\d\*\/\.\-]*)?$', cell, re.IGNORECASE)
+        num_match = _LAB_NUM_RE.match(cell)
         if num_match and value is None:
             value = float(num_match.group(1).replace(',', '.'))
             if num_match.group(2):
@@ -103,14 +137,14 @@ def parse_lab_row(row: List[str]) -> Optional[Dict[str, Any]]:
             continue
         
         # Try to extract reference range
-        ref_match = re.search(r'(\d+(?:[.,]\d+)?)\s*[-–—]\s*(\d+(?:[.,]\d+)?)', cell)
+        ref_match = _LAB_RANGE_RE.search(cell)
         if ref_match:
             ref_min = float(ref_match.group(1).replace(',', '.'))
             ref_max = float(ref_match.group(2).replace(',', '.'))
             continue
         
         # Single-bound reference (< X or > X)
-        single_ref = re.search(r'[<>≤≥]\s*(\d+(?:[.,]\d+)?)', cell)
+        single_ref = _LAB_SINGLE_RE.search(cell)
         if single_ref:
             bound = float(single_ref.group(1).replace(',', '.'))
             if '<' in cell or '≤' in cell:
@@ -137,53 +171,57 @@ def parse_lab_row(row: List[str]) -> Optional[Dict[str, Any]]:
     return None
 
 
-def extract_text_from_pdf(file_bytes: bytes) -> str:
+def extract_text_from_pdf(file_bytes: PdfSource) -> str:
     """
     Extract text from PDF using pdfplumber with PyMuPDF as fallback.
     """
     text_parts: List[str] = []
     try:
-        with pdfplumber.open(BytesIO(file_bytes)) as pdf:
+        with pdfplumber.open(_open_stream(file_bytes)) as pdf:
             total_pages = len(pdf.pages)
-            print(f"[DEBUG] Text extraction: PDF has {total_pages} pages")
+            logger.debug("Text extraction: PDF has %d pages", total_pages)
             
             for page_num, page in enumerate(pdf.pages, 1):
                 page_text = page.extract_text() or ""
-                text_len = len(page_text)
-                print(f"[DEBUG] Page {page_num}/{total_pages}: extracted {text_len} chars")
+                logger.debug("Page %d/%d: extracted %d chars", page_num, total_pages, len(page_text))
                 if page_text:
                     text_parts.append(page_text)
+                page.close()
     except Exception as e:
-        print(f"[DEBUG] pdfplumber error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("pdfplumber error: %s", e)
 
     extracted = "\n".join(text_parts).strip()
-    total_chars = len(extracted)
-    print(f"[DEBUG] pdfplumber total: {total_chars} chars from {len(text_parts)} pages")
+    logger.debug("pdfplumber total: %d chars from %d pages", len(extracted), len(text_parts))
     
     if extracted or fitz is None:
         return extracted
 
     # Fallback to PyMuPDF
-    print("[DEBUG] Trying PyMuPDF fallback...")
+    logger.debug("Trying PyMuPDF fallback...")
     fallback_parts: List[str] = []
     try:
-        with fitz.open(stream=file_bytes, filetype="pdf") as doc:  # type: ignore
+        with fitz.open(stream=_read_bytes(file_bytes), filetype="pdf") as doc:  # type: ignore
             for page_num, page in enumerate(doc, 1):
                 page_text = page.get_text("text") or ""
-                print(f"[DEBUG] PyMuPDF page {page_num}: {len(page_text)} chars")
+                logger.debug("PyMuPDF page %d: %d chars", page_num, len(page_text))
                 if page_text:
                     fallback_parts.append(page_text)
     except Exception as e:
-        print(f"[DEBUG] PyMuPDF error: {e}")
+        logger.warning("PyMuPDF error: %s", e)
         return extracted
 
     fallback_text = "\n".join(fallback_parts).strip()
-    print(f"[DEBUG] PyMuPDF total: {len(fallback_text)} chars")
+    logger.debug("PyMuPDF total: %d chars", len(fallback_text))
     return fallback_text
 
 
+_WHITESPACE_TRANSLATION = str.maketrans({"\r": None, "\t": " "})
+_HYPHEN_BREAK_RE = re.compile(r"(\w)-\n(\w)")
+_MULTI_SPACE_RE = re.compile(r"[ ]{2,}")
+_DECIMAL_COMMA_RE = re.compile(r"(?P<int>\d+),(?P<dec>\d+)")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+
 def normalize_text(text: str) -> str:
     """
     Normalize extracted text to simplify parsing.
@@ -195,10 +233,15 @@ def normalize_text(text: str) -> str:
     if not text:
         return ""
 
-    normalized = text.replace("\r", "")
-    normalized = re.sub(r"(\w)-\n(\w)", r"\1\2", normalized)
-    normalized = normalized.replace("\t", " ")
-    normalized = re.sub(r"[ ]{2,}", " ", normalized)
-    normalized = re.sub(r"(?P<int>\d+),(?P<dec>\d+)", r"\g<int>.\g<dec>", normalized)
-    normalized = re.sub(r"\n{3,}", "\n\n", normalized).strip()
-    return normalized
+    # One translate pass for \r and \t; regex passes are skipped when
+    # their trigger substring is absent (cheap C-level scans)
+    normalized = text.translate(_WHITESPACE_TRANSLATION)
+    if "-\n" in normalized:
+        normalized = _HYPHEN_BREAK_RE.sub(r"\1\2", normalized)
+    if "  " in normalized:
+        normalized = _MULTI_SPACE_RE.sub(" ", normalized)
+    if "," in normalized:
+        normalized = _DECIMAL_COMMA_RE.sub(r"\g<int>.\g<dec>", normalized)
+    if "\n\n\n" in normalized:
+        normalized = _BLANK_LINES_RE.sub("\n\n", normalized)
+    return normalized.strip()
@@ -0,0 +1,44 @@
+"""
+Cache for SOAP analyses.
+
+Only exact repeats of a transcript (a retried upload, a resent recording)
+are answered from the cache, keyed by a SHA-256 digest of the language and
+the transcript. Near-duplicate matching is deliberately not done: a similar
+transcript belongs to a different consultation, and serving its note would
+hand one patient's data to another. Entries are kept in memory only and are
+never written to disk, since they contain patient data.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.services.cache import LRUCache
+
+
+class SoapCache:
+    """Bounded, thread-safe exact-match cache of SOAP analyses keyed on the transcript."""
+
+    def __init__(self, max_entries: int = 5000):
+        self._entries: LRUCache[Dict[str, Any]] = LRUCache(maxsize=max_entries)
+
+    @staticmethod
+    def _digest(transcript: str, language: str) -> str:
+        return hashlib.sha256(f"{language}\x00{transcript}".encode("utf-8")).hexdigest()
+
+    def lookup(self, transcript: str, language: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the analysis cached for this exact transcript, if any."""
+        hit = self._entries.get(self._digest(transcript, language))
+        return dict(hit) if hit is not None else None
+
+    def store(self, transcript: str, language: str, analysis: Dict[str, Any]) -> None:
+        """Remember a successful analysis; the least recently used entry is evicted when full."""
+        self._entries.set(self._digest(transcript, language), dict(analysis))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+soap_cache = SoapCache(max_entries=settings.SOAP_CACHE_MAX_ENTRIES)
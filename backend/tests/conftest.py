@@ -15,18 +15,20 @@ if str(ROOT_DIR) not in sys.path:
 
 def pytest_sessionstart(session):  # noqa: D401
     """Clean test database file before running the suite."""
-    db_file = Path("./test.db")
-    try:
-        from app import models
-        from app.db import engine
+    asyncio.run(_reset_test_db(Path("./test.db")))
 
-        asyncio.run(engine.dispose())
 
-        async def _drop_all():
-            async with engine.begin() as conn:
-                await conn.run_sync(models.Base.metadata.drop_all)
+async def _reset_test_db(db_file: Path) -> None:
+    """Drop, delete and recreate the test database in one event loop."""
+    from app import models
+    from app.db import engine, init_db
 
-        asyncio.run(_drop_all())
+    try:
+        await engine.dispose()
+        async with engine.begin() as conn:
+            await conn.run_sync(models.Base.metadata.drop_all)
+        # Release the pooled connection before the file is removed
+        await engine.dispose()
     except Exception:
         pass
     if db_file.exists():
@@ -34,6 +36,5 @@ def pytest_sessionstart(session):  # noqa: D401
             db_file.unlink()
         except PermissionError:
             pass
-    from app.db import init_db
 
-    asyncio.run(init_db())
+    await init_db()
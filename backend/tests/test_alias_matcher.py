@@ -0,0 +1,39 @@
+from app.api.endpoints.blood import match_marker_name
+from app.services.alias_matcher import AliasMatcher
+
+
+def test_find_all_reports_overlapping_aliases():
+    matcher = AliasMatcher([("холестерин", "cholesterol"), ("холестерин-лпнп", "ldl"), ("лпнп", "ldl")])
+
+    assert sorted(matcher.find_all("холестерин-лпнп 3.1")) == [
+        (0, 10, "cholesterol"),
+        (0, 15, "ldl"),
+        (11, 15, "ldl"),
+    ]
+
+
+def test_first_registered_key_wins_duplicates():
+    matcher = AliasMatcher([("гемоглобин", "hemoglobin"), ("гемоглобин", "hba1c")])
+
+    assert matcher.longest("гемоглобин") == "hemoglobin"
+
+
+def test_match_marker_name_prefers_longest_alias():
+    assert match_marker_name("Холестерин-ЛПНП") == "ldl"
+    assert match_marker_name("Холестерин общий") == "cholesterol"
+    assert match_marker_name("Гликированный гемоглобин") == "hba1c"
+    assert match_marker_name("Гемоглобин (HGB)") == "hemoglobin"
+
+
+def test_match_marker_name_without_alias_returns_none():
+    assert match_marker_name("Комментарий врача") is None
+    assert match_marker_name("") is None
+
+
+def test_word_start_ignores_aliases_inside_words():
+    matcher = AliasMatcher([("ht", "hematocrit"), ("алт", "alt")], word_start=True)
+
+    assert matcher.longest("height") is None
+    assert matcher.longest("базалт") is None
+    assert matcher.longest("алт (alt)") == "alt"
+    assert matcher.longest("гематокрит, ht") == "hematocrit"
@@ -0,0 +1,359 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.api.endpoints import analysis
+
+
+client = TestClient(app)
+
+TRANSCRIPT = "Пациент жалуется на головную боль в течение недели."
+
+
+def _fake_transcribe(texts: dict[bytes, str]):
+    async def transcribe(audio_data: bytes, language: str = "auto") -> dict:
+        return {"text": texts.get(audio_data, ""), "language": "ru", "segments": []}
+
+    return transcribe
+
+
+async def _fake_soap(transcript: str, language: str = "ru", on_field=None) -> dict:
+    if on_field is not None:
+        await on_field("subjective", transcript)
+    return {"subjective": transcript, "plan": "Покой", "dialogueProtocol": ""}
+
+
+def test_single_blob_returns_completed_result(monkeypatch):
+    blob = b"a" * 2000
+    monkeypatch.setattr(analysis, "transcribe_audio", _fake_transcribe({blob: TRANSCRIPT}))
+    monkeypatch.setattr(analysis, "generate_soap_analysis", _fake_soap)
+
+    with client.websocket_connect("/ws/analyze") as ws:
+        ws.send_bytes(blob)
+        partial = ws.receive_json()
+        field = ws.receive_json()
+        completed = ws.receive_json()
+
+    assert partial == {"status": "partial", "idx": 0, "text": TRANSCRIPT}
+    assert field == {"status": "partial", "field": "subjective", "value": TRANSCRIPT}
+    assert completed["status"] == "completed"
+    assert completed["language"] == "ru"
+    assert completed["result"]["subjective"] == TRANSCRIPT
+    assert completed["result"]["dialogueProtocol"] == TRANSCRIPT
+
+
+def test_streamed_segments_are_joined_in_order(monkeypatch):
+    first, second = b"1" * 2000, b"2" * 2000
+    texts = {first: "Первый сегмент разговора.", second: "Второй сегмент разговора."}
+    monkeypatch.setattr(analysis, "transcribe_audio", _fake_transcribe(texts))
+    monkeypatch.setattr(analysis, "generate_soap_analysis", _fake_soap)
+
+    with client.websocket_connect("/ws/analyze") as ws:
+        ws.send_text(json.dumps({"event": "start"}))
+        ws.send_bytes(first)
+        ws.send_bytes(second)
+        ws.send_text(json.dumps({"event": "end"}))
+        frames = [ws.receive_json() for _ in range(4)]
+
+    partials = sorted((f for f in frames if "idx" in f), key=lambda f: f["idx"])
+    assert [f["text"] for f in partials] == [texts[first], texts[second]]
+    assert frames[-1]["status"] == "completed"
+    assert frames[-1]["result"]["subjective"] == f"{texts[first]} {texts[second]}"
+
+
+@pytest.mark.parametrize(
+    ("protocol", "expected"),
+    [("SPEAKER_0: Здравствуйте\nSPEAKER_1: Болит голова", "SPEAKER_0: Здравствуйте\nSPEAKER_1: Болит голова"),
+     ("", TRANSCRIPT)],
+)
+def test_dialogue_protocol_falls_back_to_transcript_only_when_empty(monkeypatch, protocol, expected):
+    blob = b"a" * 2000
+
+    async def soap(transcript: str, language: str = "ru", on_field=None) -> dict:
+        return {"subjective": transcript, "plan": "Покой", "dialogueProtocol": protocol}
+
+    monkeypatch.setattr(analysis, "transcribe_audio", _fake_transcribe({blob: TRANSCRIPT}))
+    monkeypatch.setattr(analysis, "generate_soap_analysis", soap)
+
+    with client.websocket_connect("/ws/analyze") as ws:
+        ws.send_bytes(blob)
+        ws.receive_json()
+        completed = ws.receive_json()
+
+    assert completed["status"] == "completed"
+    assert completed["result"]["dialogueProtocol"] == expected
+
+
+def test_small_blob_is_rejected_without_transcription(monkeypatch):
+    async def fail(*_args, **_kwargs):
+        raise AssertionError("transcription must not run")
+
+    monkeypatch.setattr(analysis, "transcribe_audio", fail)
+
+    with client.websocket_connect("/ws/analyze") as ws:
+        ws.send_bytes(b"tiny")
+        response = ws.receive_json()
+
+    assert response["status"] == "error"
+
+
+def test_short_recording_is_rejected_before_transcription(monkeypatch):
+    async def fail(*_args, **_kwargs):
+        raise AssertionError("transcription must not run")
+
+    monkeypatch.setattr(analysis, "transcribe_audio", fail)
+    monkeypatch.setattr(analysis, "probe_duration", lambda _: 1.2)
+
+    with client.websocket_connect("/ws/analyze") as ws:
+        ws.send_bytes(b"a" * 2000)
+        response = ws.receive_json()
+
+    assert response["status"] == "error"
+
+
+def test_silent_segment_skips_whisper(monkeypatch):
+    async def fail(*_args, **_kwargs):
+        raise AssertionError("transcription must not run")
+
+    monkeypatch.setattr(analysis, "transcribe_audio", fail)
+    monkeypatch.setattr(analysis, "voiced_seconds", lambda _: 0.0)
+
+    with client.websocket_connect("/ws/analyze") as ws:
+        ws.send_bytes(b"a" * 2000)
+        response = ws.receive_json()
+
+    assert response == {"status": "error", "message": "No speech detected in the recording"}
+
+
+def test_field_scanner_emits_completed_top_level_strings():
+    scanner = analysis._SoapFieldScanner()
+    emitted = []
+    for chunk in ['```json\n{"subj', 'ective": "Боль \\"в', ' груди\\"", "score": 1', '2, "plan', '": "Покой"}']:
+        emitted.extend(scanner.feed(chunk))
+
+    assert emitted == [("subjective", 'Боль "в груди"'), ("plan", "Покой")]
+
+
+def test_soap_analysis_is_streamed_field_by_field(monkeypatch):
+    content = json.dumps({"subjective": "Головная боль", "plan": "Покой"}, ensure_ascii=False)
+    deltas = [content[i:i + 7] for i in range(0, len(content), 7)]
+    sse = "".join(
+        f"data: {json.dumps({'choices': [{'delta': {'content': d}}]})}\n\n" for d in deltas
+    ) + "data: [DONE]\n\n"
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        assert body["stream"] is True
+        assert body["response_format"] == {"type": "json_object"}
+        return httpx.Response(200, text=sse)
+
+    monkeypatch.setattr(analysis, "_json_mode_streaming", True)
+    monkeypatch.setattr(analysis, "GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(analysis, "_http_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(analysis.soap_cache, "lookup", lambda *_: None)
+    monkeypatch.setattr(analysis.soap_cache, "store", lambda *_: None)
+
+    fields = []
+
+    async def on_field(field, value):
+        fields.append((field, value))
+
+    result = asyncio.run(analysis.generate_soap_analysis(TRANSCRIPT, "ru", on_field=on_field))
+
+    assert fields == [("subjective", "Головная боль"), ("plan", "Покой")]
+    assert result["subjective"] == "Головная боль"
+    assert result["plan"] == "Покой"
+    assert result["assessment"] == ""
+
+
+def _sse(content: str) -> str:
+    deltas = [content[i:i + 7] for i in range(0, len(content), 7)]
+    return "".join(
+        f"data: {json.dumps({'choices': [{'delta': {'content': d}}]})}\n\n" for d in deltas
+    ) + "data: [DONE]\n\n"
+
+
+def test_rejected_json_mode_is_retried_as_plain_stream(monkeypatch):
+    content = "```json\n" + json.dumps({"subjective": "Головная боль", "plan": "Покой"}, ensure_ascii=False) + "\n```"
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        requests.append("response_format" in body)
+        if "response_format" in body:
+            return httpx.Response(400, text="response_format is not supported with streaming")
+        return httpx.Response(200, text=_sse(content))
+
+    monkeypatch.setattr(analysis, "_json_mode_streaming", True)
+    monkeypatch.setattr(analysis, "GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(analysis, "_http_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(analysis.soap_cache, "lookup", lambda *_: None)
+    monkeypatch.setattr(analysis.soap_cache, "store", lambda *_: None)
+
+    first = asyncio.run(analysis.generate_soap_analysis(TRANSCRIPT, "ru"))
+    second = asyncio.run(analysis.generate_soap_analysis(TRANSCRIPT, "ru"))
+
+    assert first["plan"] == "Покой"
+    assert second["plan"] == "Покой"
+    # JSON mode is tried once, then skipped for later requests
+    assert requests == [True, False, False]
+
+
+def test_one_malformed_generation_does_not_disable_json_mode(monkeypatch):
+    content = json.dumps({"subjective": "Головная боль", "plan": "Покой"}, ensure_ascii=False)
+    failed = {"error": {
+        "message": "Failed to generate JSON. Please adjust your prompt.",
+        "code": "json_validate_failed",
+        "failed_generation": "response_format stream",
+    }}
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        json_mode = "response_format" in json.loads(request.content)
+        requests.append(json_mode)
+        if json_mode and len(requests) == 1:
+            return httpx.Response(400, json=failed)
+        return httpx.Response(200, text=_sse(content))
+
+    monkeypatch.setattr(analysis, "_json_mode_streaming", True)
+    monkeypatch.setattr(analysis, "GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(analysis, "_http_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(analysis.soap_cache, "lookup", lambda *_: None)
+    monkeypatch.setattr(analysis.soap_cache, "store", lambda *_: None)
+
+    first = asyncio.run(analysis.generate_soap_analysis(TRANSCRIPT, "ru"))
+    second = asyncio.run(analysis.generate_soap_analysis(TRANSCRIPT, "ru"))
+
+    assert first["plan"] == second["plan"] == "Покой"
+    assert requests == [True, False, True]
+
+
+def test_incomplete_small_model_answer_is_escalated(monkeypatch):
+    answers = {
+        analysis.SOAP_MODELS[0]: {"subjective": "Головная боль", "plan": ""},
+        analysis.SOAP_MODELS[1]: {"subjective": "Головная боль", "plan": "Покой"},
+    }
+    models = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        model = json.loads(request.content)["model"]
+        models.append(model)
+        return httpx.Response(200, text=_sse(json.dumps(answers[model], ensure_ascii=False)))
+
+    monkeypatch.setattr(analysis, "GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(analysis, "_http_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(analysis.soap_cache, "lookup", lambda *_: None)
+    monkeypatch.setattr(analysis.soap_cache, "store", lambda *_: None)
+
+    result = asyncio.run(analysis.generate_soap_analysis(TRANSCRIPT, "ru"))
+
+    assert models == list(analysis.SOAP_MODELS)
+    assert result["plan"] == "Покой"
+
+
+def _over_capacity(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(503, text="over capacity")
+
+
+def _timeout(request: httpx.Request) -> httpx.Response:
+    raise httpx.ReadTimeout("timed out", request=request)
+
+
+@pytest.mark.parametrize("fail", [_over_capacity, _timeout])
+def test_small_model_answer_is_kept_when_escalation_fails(monkeypatch, fail):
+    def handler(request: httpx.Request) -> httpx.Response:
+        model = json.loads(request.content)["model"]
+        if model == analysis.SOAP_MODELS[-1]:
+            return fail(request)
+        answer = {"subjective": "Головная боль", "plan": ""}
+        return httpx.Response(200, text=_sse(json.dumps(answer, ensure_ascii=False)))
+
+    monkeypatch.setattr(analysis, "GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(analysis, "_http_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(analysis.soap_cache, "lookup", lambda *_: None)
+    monkeypatch.setattr(analysis.soap_cache, "store", lambda *_: None)
+
+    result = asyncio.run(analysis.generate_soap_analysis(TRANSCRIPT, "ru"))
+
+    assert "error" not in result
+    assert result["subjective"] == "Головная боль"
+
+
+def test_non_string_fields_are_accepted_without_escalation(monkeypatch):
+    models = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        models.append(json.loads(request.content)["model"])
+        answer = {"subjective": "Головная боль", "objective": None, "plan": ["Покой", "Парацетамол"]}
+        return httpx.Response(200, text=_sse(json.dumps(answer, ensure_ascii=False)))
+
+    monkeypatch.setattr(analysis, "GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(analysis, "_http_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(analysis.soap_cache, "lookup", lambda *_: None)
+    monkeypatch.setattr(analysis.soap_cache, "store", lambda *_: None)
+
+    result = asyncio.run(analysis.generate_soap_analysis(TRANSCRIPT, "ru"))
+
+    assert set(models) == {analysis.SOAP_MODELS[0]}
+    assert result["objective"] == ""
+    assert result["plan"] == "Покой\nПарацетамол"
+
+
+def test_repeated_audio_is_transcribed_once(monkeypatch):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, json={"text": TRANSCRIPT, "language": "russian"})
+
+    monkeypatch.setattr(analysis, "GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(analysis, "_http_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(analysis, "_whisper_cache", analysis.LRUCache(maxsize=4))
+
+    async def run():
+        return [await analysis.transcribe_audio(b"x" * 2000) for _ in range(2)]
+
+    first, second = asyncio.run(run())
+
+    assert first == second
+    assert first["text"] == TRANSCRIPT
+    assert len(calls) == 1
+
+
+def test_sessions_over_the_limit_are_queued(monkeypatch):
+    blob = b"a" * 2000
+    monkeypatch.setattr(analysis, "transcribe_audio", _fake_transcribe({blob: TRANSCRIPT}))
+    monkeypatch.setattr(analysis, "generate_soap_analysis", _fake_soap)
+    monkeypatch.setattr(analysis, "QUEUE_STATUS_INTERVAL", 0.05)
+    monkeypatch.setattr(analysis, "_analysis_semaphore", asyncio.Semaphore(0))
+
+    with client.websocket_connect("/ws/analyze") as ws:
+        assert ws.receive_json() == {"status": "queued", "position": 1}
+        assert ws.receive_json() == {"status": "queued", "position": 1}
+
+
+def test_language_is_pinned_after_first_segment(monkeypatch):
+    languages = []
+
+    async def transcribe(audio_data: bytes, language: str = "auto") -> dict:
+        languages.append(language)
+        return {"text": "Сегмент разговора с пациентом.", "language": "russian", "segments": []}
+
+    monkeypatch.setattr(analysis, "transcribe_audio", transcribe)
+    monkeypatch.setattr(analysis, "generate_soap_analysis", _fake_soap)
+
+    with client.websocket_connect("/ws/analyze") as ws:
+        ws.send_text(json.dumps({"event": "start"}))
+        ws.send_bytes(b"1" * 2000)
+        assert ws.receive_json()["idx"] == 0
+        ws.send_bytes(b"2" * 2000)
+        assert ws.receive_json()["idx"] == 1
+        ws.send_text(json.dumps({"event": "end"}))
+        ws.receive_json()
+        ws.receive_json()
+
+    assert languages == ["auto", "ru"]
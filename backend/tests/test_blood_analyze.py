@@ -0,0 +1,71 @@
+from fastapi.testclient import TestClient
+from app.main import app
+
+
+client = TestClient(app)
+
+
+def _marker(name, value, ref_min, ref_max):
+    return {
+        "name": name,
+        "value": value,
+        "unit": "g/L",
+        "reference_min": ref_min,
+        "reference_max": ref_max,
+        "status": "",
+    }
+
+
+def test_analyze_classifies_each_marker():
+    response = client.post(
+        "/api/v1/services/blood/analyze",
+        json={"markers": [
+            _marker("hemoglobin", 140, 120, 160),
+            _marker("ferritin", 8, 12, 150),
+            _marker("alt", 100, 0, 40),
+        ]},
+    )
+
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["markers_analyzed"] == 3
+    assert [r["risk_level"] for r in payload["risk_factors"]] == ["normal", "critical_low", "critical_high"]
+    assert payload["risk_factors"][0]["current_value"] == 140
+    assert payload["overall_risk"] == "high"
+
+
+def test_analyze_all_normal_is_low_risk():
+    response = client.post(
+        "/api/v1/services/blood/analyze",
+        json={"markers": [_marker("hemoglobin", 140, 120, 160)]},
+    )
+
+    assert response.json()["overall_risk"] == "low"
+
+
+def test_zero_width_range_has_no_deviation_in_interpretation():
+    response = client.post(
+        "/api/v1/services/blood/analyze",
+        json={"markers": [_marker("inr", 1.0, 1.0, 1.0), _marker("hemoglobin", 160, 120, 160)]},
+    )
+
+    fixed, ranged = response.json()["risk_factors"]
+    assert fixed["risk_level"] == "normal"
+    assert "z=" not in fixed["interpretation"]
+    assert ranged["interpretation"].endswith("(z=+1.00)")
+
+
+def test_analyze_documents_result_schema():
+    ok = app.openapi()["paths"]["/api/v1/services/blood/analyze"]["post"]["responses"]["200"]
+
+    assert ok["content"]["application/json"]["schema"]["$ref"].endswith("/BloodAnalysisResult")
+
+
+def test_supported_markers_revalidates_with_etag():
+    response = client.get("/api/v1/services/blood/supported-markers")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    cached = client.get("/api/v1/services/blood/supported-markers", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
@@ -5,6 +5,7 @@ from app.services.blood_nlp_extractor import (
     BloodNLPExtractor,
     extract_blood_analysis,
     MarkerResult,
+    mentioned_markers,
 )
 
 
@@ -267,6 +268,15 @@ class TestBloodNLPExtractor:
         assert result.platelets is not None
         assert result.esr is not None
 
+    def test_unclosed_parentheses_do_not_hide_later_value(self, extractor):
+        """Test that many unclosed comments still leave the fallback value reachable."""
+        text = "\n".join(["Глюкоза (комментарий"] * 5000) + "\nГлюкоза\n5.4"
+
+        result = extractor.extract(text)
+
+        assert result.glucose is not None
+        assert result.glucose.value == 5.4
+
 
 class TestExtractBloodAnalysis:
     """Test the main extract_blood_analysis function."""
@@ -300,6 +310,22 @@ class TestExtractBloodAnalysis:
         assert summary["critical_count"] >= 1  # Hemoglobin critical low
         assert summary["warning_count"] >= 0
 
+    def test_repeated_text_returns_independent_copy(self):
+        """Test that a cached re-extraction is not affected by mutating an earlier result."""
+        text = """
+        Гемоглобин: 132 г/л
+        Глюкоза: 5.4 ммоль/л
+        """
+        
+        first = extract_blood_analysis(text)
+        first["markers"]["hemoglobin"]["value"] = 0
+        first["markers"].pop("glucose")
+        
+        second = extract_blood_analysis(text)
+        
+        assert second["markers"]["hemoglobin"]["value"] == 132.0
+        assert second["markers"]["glucose"]["value"] == 5.4
+
 
 class TestCoagulationMarkers:
     """Test coagulation marker extraction."""
@@ -365,10 +391,15 @@ class TestTumorMarkers:
         assert result.ca199.value == 25.0
 
 
+class TestMentionedMarkers:
+    """Test the cheap check for markers named in a report."""
 
+    def test_aliases_inside_words_or_without_value_are_ignored(self):
+        text = """
+        www.invivo.kz  Возраст: 45 лет
+        Калий
+        Гемоглобин: 132 г/л
+        АЛТ/АСТ: 25/18 Ед/л
+        """
 
-
-
-
-
-
+        assert mentioned_markers(text) == {"hemoglobin", "alt", "ast"}
@@ -1,3 +1,4 @@
+import pytest
 from fastapi.testclient import TestClient
 from app.main import app
 from app.api.endpoints import blood
@@ -6,6 +7,13 @@ from app.api.endpoints import blood
 client = TestClient(app)
 
 
+@pytest.fixture(autouse=True)
+def clear_pdf_result_cache():
+    blood._pdf_result_cache.clear()
+    yield
+    blood._pdf_result_cache.clear()
+
+
 def test_upload_pdf_returns_parsed_markers(monkeypatch):
     sample_text = "Гемоглобин 140 г/л\nАЛТ/АСТ 20/18"
     monkeypatch.setattr(blood, "extract_text_from_pdf", lambda _: sample_text)
@@ -29,6 +37,28 @@ def test_upload_pdf_returns_parsed_markers(monkeypatch):
     assert payload["rawTextLength"] == len(sample_text)
 
 
+def test_upload_pdf_reuses_result_for_same_file(monkeypatch):
+    calls = []
+
+    def extract(_):
+        calls.append(1)
+        return "Гемоглобин 140 г/л"
+
+    monkeypatch.setattr(blood, "extract_text_from_pdf", extract)
+
+    for patient_id in ("p-1", "p-2"):
+        response = client.post(
+            "/api/v1/services/blood/upload-pdf",
+            files={"file": ("test.pdf", b"same pdf", "application/pdf")},
+            data={"patient_id": patient_id},
+        )
+        assert response.status_code == 200
+        assert response.json()["patientId"] == patient_id
+        assert response.json()["extracted"]["hemoglobin"]["value"] == 140.0
+
+    assert len(calls) == 1
+
+
 def test_upload_pdf_without_text_returns_422(monkeypatch):
     monkeypatch.setattr(blood, "extract_text_from_pdf", lambda _: "")
 
@@ -40,3 +70,106 @@ def test_upload_pdf_without_text_returns_422(monkeypatch):
 
     assert response.status_code == 422
     assert response.json()["detail"] == "PDF contains no extractable text. OCR is not supported."
+
+
+def test_upload_pdf_over_size_limit_returns_413(monkeypatch):
+    monkeypatch.setattr(blood.settings, "PDF_MAX_UPLOAD_BYTES", 4)
+
+    def fail(_):
+        raise AssertionError("oversized PDF must not be parsed")
+
+    monkeypatch.setattr(blood, "extract_text_from_pdf", fail)
+
+    response = client.post(
+        "/api/v1/services/blood/upload-pdf",
+        files={"file": ("test.pdf", b"dummy", "application/pdf")},
+    )
+
+    assert response.status_code == 413
+
+
+def test_extract_nlp_skips_text_pass_when_tables_cover_report(monkeypatch):
+    monkeypatch.setattr(blood.settings, "TABLE_COVERAGE_MIN_MARKERS", 1)
+    monkeypatch.setattr(blood, "extract_tables_from_pdf", lambda _: [])
+    monkeypatch.setattr(
+        blood,
+        "extract_lab_data_from_tables",
+        lambda _: [{"name": "Гемоглобин", "value": 140.0, "unit": "г/л", "reference_min": 120.0, "reference_max": 160.0}],
+    )
+    monkeypatch.setattr(blood, "extract_text_from_pdf", lambda _: "Гемоглобин 140 г/л")
+
+    def fail(_):
+        raise AssertionError("NLP pass must be skipped")
+
+    monkeypatch.setattr(blood, "extract_blood_analysis", fail)
+
+    response = client.post(
+        "/api/v1/services/blood/extract-nlp",
+        files={"file": ("test.pdf", b"dummy", "application/pdf")},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["markers"]["hemoglobin"]["value"] == 140.0
+
+
+TABLE_ROWS = [
+    {"name": "Гемоглобин", "value": 132.0, "unit": "г/л", "reference_min": 120.0, "reference_max": 160.0},
+    {"name": "Глюкоза", "value": 7.1, "unit": "ммоль/л", "reference_min": None, "reference_max": None},
+]
+TABLE_TEXT = "Гемоглобин 132 г/л 120-160\nГлюкоза 7.1 ммоль/л"
+
+
+def _extract_markers(monkeypatch, text, min_markers):
+    monkeypatch.setattr(blood.settings, "TABLE_COVERAGE_MIN_MARKERS", min_markers)
+    monkeypatch.setattr(blood, "extract_tables_from_pdf", lambda _: [])
+    monkeypatch.setattr(blood, "extract_lab_data_from_tables", lambda _: [dict(row) for row in TABLE_ROWS])
+    monkeypatch.setattr(blood, "extract_text_from_pdf", lambda _: text)
+    blood._pdf_result_cache.clear()
+
+    response = client.post(
+        "/api/v1/services/blood/extract-nlp",
+        files={"file": ("test.pdf", b"dummy", "application/pdf")},
+    )
+
+    assert response.status_code == 200
+    return response.json()["markers"]
+
+
+def test_table_only_path_matches_full_extraction(monkeypatch):
+    fields = ("value", "unit", "reference_min", "reference_max", "status")
+    shortcut = _extract_markers(monkeypatch, TABLE_TEXT, 1)
+    full = _extract_markers(monkeypatch, TABLE_TEXT, 100)
+
+    assert shortcut.keys() == full.keys() == {"hemoglobin", "glucose"}
+    for key in full:
+        assert {f: shortcut[key][f] for f in fields} == {f: full[key][f] for f in fields}
+    assert shortcut["glucose"]["status"] == "high"
+
+
+def test_marker_missing_from_tables_forces_text_pass(monkeypatch):
+    markers = _extract_markers(monkeypatch, TABLE_TEXT + "\nКреатинин 85 мкмоль/л", 1)
+
+    assert markers["creatinine"]["value"] == 85.0
+    assert markers["hemoglobin"]["value"] == 132.0
+
+
+REPORT_HEADER = (
+    "ТОО «Инвиво» Лаборатория, г. Алматы, тел.: +7 (727) 300-30-30\n"
+    "www.invivo.kz  info@invivo.kz\n"
+    "Пациент: Иванов Иван Иванович  Пол: М  Возраст: 45 лет  Дата рождения: 01.02.1979\n"
+    "Заказ № 123456789  Дата взятия: 12.03.2024 08:15\n"
+    "Исследование Результат Ед. изм. Референсные значения\n"
+)
+REPORT_FOOTER = "\nРезультаты исследований не являются диагнозом.\nСтр. 1 из 1  Лицензия № 12345 от 01.01.2010"
+
+
+def test_report_header_and_footer_do_not_force_text_pass(monkeypatch):
+    def fail(_):
+        raise AssertionError("NLP pass must be skipped")
+
+    monkeypatch.setattr(blood, "extract_blood_analysis", fail)
+
+    markers = _extract_markers(monkeypatch, REPORT_HEADER + TABLE_TEXT + REPORT_FOOTER, 1)
+
+    assert markers["hemoglobin"]["value"] == 132.0
+    assert markers["glucose"]["value"] == 7.1
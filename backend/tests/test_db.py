@@ -0,0 +1,11 @@
+from app.db import _json_deserializer, _json_serializer
+
+
+def test_json_columns_round_trip_integers_wider_than_64_bits():
+    state = {"flow_step": "intake", "nonce": 2**70, 1: "int key"}
+
+    assert _json_deserializer(_json_serializer(state)) == {"flow_step": "intake", "nonce": 2**70, "1": "int key"}
+
+
+def test_json_columns_keep_unicode_on_the_fast_path():
+    assert _json_deserializer(_json_serializer({"note": "Головная боль"})) == {"note": "Головная боль"}
@@ -173,3 +173,37 @@ def test_state_persists_through_pause_and_resume():
     assert payload["state"]["context"]["symptom"] == "fatigue"
     assert payload["state"]["context"]["next_step"] == "follow-up"
     assert len(payload["state"]["messages"]) == 2
+
+
+def test_messages_keep_order_and_pause_can_replace_history():
+    seed = {"role": "system", "content": "seed", "timestamp": "2024-01-01T00:00:00+00:00"}
+    encounter = _start_encounter(state={"messages": [seed]})
+
+    for index in range(3):
+        response = client.post(
+            f"/api/v1/encounters/{encounter['id']}/messages",
+            json={"content": f"turn-{index}", "role": "user"},
+            headers=_headers("user-1"),
+        )
+        assert response.status_code == 200
+
+    fetched = client.get(f"/api/v1/encounters/{encounter['id']}", headers=_headers("user-1"))
+    contents = [message["content"] for message in fetched.json()["state"]["messages"]]
+    assert contents == ["seed", "turn-0", "turn-1", "turn-2"]
+
+    paused = client.post(
+        f"/api/v1/encounters/{encounter['id']}/pause",
+        json={"state": {"messages": [seed]}},
+        headers=_headers("user-1"),
+    )
+    assert paused.status_code == 200
+    assert paused.json()["state"]["messages"] == [seed]
+
+
+def test_state_with_integer_wider_than_64_bits_round_trips():
+    encounter = _start_encounter(state={"flow_step": "intake", "nonce": 2**70})
+
+    response = client.get(f"/api/v1/encounters/{encounter['id']}", headers=_headers("user-1"))
+
+    assert response.status_code == 200
+    assert response.json()["state"]["nonce"] == 2**70
@@ -0,0 +1,14 @@
+import asyncio
+
+from app.core import executor
+
+
+def test_process_pool_spawns_a_bounded_number_of_workers():
+    try:
+        assert asyncio.run(executor.run_cpu_bound(sum, (1, 2, 3), use_process=True)) == 6
+
+        pool = executor._get_process_pool()
+        assert pool._mp_context.get_start_method() == "spawn"
+        assert pool._max_workers <= executor.settings.PDF_PARSE_CONCURRENCY
+    finally:
+        executor.shutdown_executor()
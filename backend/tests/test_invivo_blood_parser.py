@@ -1,4 +1,4 @@
-from app.services.invivo_blood_parser import parse_invivo_blood
+from app.services.invivo_blood_parser import parse_invivo_blood, parse_invivo_blood_with_missing
 
 
 def test_parse_invivo_ru_with_combined_alt_ast():
@@ -42,3 +42,11 @@ def test_parse_invivo_kz_aliases_and_commas():
 
     for key in ["rbc", "wbc", "alt", "ast"]:
         assert result[key]["confidence"] == 1.0
+
+
+def test_parse_invivo_reports_missing_markers():
+    result, missing = parse_invivo_blood_with_missing("Гемоглобин 145 г/л\nАЛТ/АСТ 23/18\n")
+
+    assert missing == [key for key, marker in result.items() if marker["value"] is None]
+    assert "hemoglobin" not in missing
+    assert "glucose" in missing
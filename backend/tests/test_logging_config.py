@@ -0,0 +1,14 @@
+import logging
+
+from app.core.logging_config import setup_logging, shutdown_logging
+
+
+def test_app_records_still_reach_root_handlers(caplog):
+    setup_logging(logging.INFO)
+    try:
+        with caplog.at_level(logging.INFO):
+            logging.getLogger("app.api.endpoints.blood").info("parsed report")
+    finally:
+        shutdown_logging()
+
+    assert "parsed report" in caplog.messages
@@ -0,0 +1,41 @@
+from app.services.soap_cache import SoapCache
+
+
+ANALYSIS = {"subjective": "Головная боль", "plan": "Покой"}
+
+
+def test_exact_transcript_is_served_from_cache():
+    cache = SoapCache()
+    cache.store("Пациент жалуется на головную боль", "ru", ANALYSIS)
+
+    assert cache.lookup("Пациент жалуется на головную боль", "ru") == ANALYSIS
+
+
+def test_similar_transcript_or_other_language_misses():
+    cache = SoapCache()
+    cache.store("Пациент жалуется на головную боль и слабость уже неделю.", "ru", ANALYSIS)
+
+    assert cache.lookup("Пациент жалуется на головную боль и слабость уже неделю", "ru") is None
+    assert cache.lookup("Пациент жалуется на головную боль и слабость уже неделю.", "kk") is None
+
+
+def test_hit_is_an_independent_copy():
+    cache = SoapCache()
+    cache.store("Пациент жалуется на кашель", "ru", ANALYSIS)
+
+    cache.lookup("Пациент жалуется на кашель", "ru")["plan"] = "changed"
+
+    assert cache.lookup("Пациент жалуется на кашель", "ru") == ANALYSIS
+
+
+def test_least_recently_used_entry_is_evicted_when_full():
+    cache = SoapCache(max_entries=2)
+    cache.store("first", "ru", ANALYSIS)
+    cache.store("second", "ru", ANALYSIS)
+    cache.lookup("first", "ru")
+    cache.store("third", "ru", ANALYSIS)
+
+    assert len(cache) == 2
+    assert cache.lookup("first", "ru") == ANALYSIS
+    assert cache.lookup("second", "ru") is None
+    assert cache.lookup("third", "ru") == ANALYSIS
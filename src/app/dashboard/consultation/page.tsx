@@ -540,7 +540,10 @@ export default function ConsultationPage() {
     try {
       setWsStatus("connecting")
       
+      // Read the recording up front so it goes out as a single ArrayBuffer frame
+      const audioBuffer = await audioBlob.arrayBuffer()
       const ws = new WebSocket(WS_URL)
+      ws.binaryType = "arraybuffer"
       wsRef.current = ws
 
       ws.onopen = () => {
@@ -548,7 +551,7 @@ export default function ConsultationPage() {
         setWsStatus("connected")
         
         // Send audio as binary
-        ws.send(audioBlob)
+        ws.send(audioBuffer)
       }
 
       ws.onmessage = (event) => {